@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+"""Benchmarks for nosh on synthetic token trees.
+
+This script generates synthetic trees of the following shapes, and
+measures instantiate(), BasicToken.append(), CLI.longest_match(),
+CLI.complete(), CLI.execute_stream() and memory usage of the trees.
+
+- wide: a node having many TextToken leaves.
+- deep: chains of TextTokens, 100 tokens each.
+- typed: nodes having IntToken, IPv4AddressToken, IPv6NetworkToken,
+  ChoiceToken and StringToken leaves.
+- cyclic: option graph like `ping count N wait N <target>` in cli.py,
+  where every option value leads to all options. Its size is the
+  number of leaves, not the number of distinct tokens.
+
+Results can be stored as a baseline (--save) and compared with a
+baseline (--compare). Metrics slower than the baseline by more than
+--threshold are reported. Timings are scaled by a calibration
+workload, but that does not cancel the noise of different machines,
+so the comparison is a report only. With --strict, which is for a
+machine that recorded the baseline itself, it exits with 1 on
+regressions.
+
+    python3 bench/bench_nosh.py --sizes 1000,10000 --save bench/baseline.json
+    python3 bench/bench_nosh.py --sizes 1000,10000 --compare bench/baseline.json
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nosh import (
+    CLI,
+    instantiate,
+    Token,
+    TextToken,
+    StringToken,
+    IntToken,
+    IPv4AddressToken,
+    IPv6NetworkToken,
+    ChoiceToken,
+)
+
+
+def act_nop(priv, args):
+    pass
+
+
+def wide_spec(n: int) -> dict:
+    return {
+        "class": TextToken,
+        "text": "show",
+        "leaves": [
+            {"class": TextToken, "text": f"knob{i}", "desc": f"knob {i}", "action": act_nop}
+            for i in range(n)
+        ],
+    }
+
+
+def deep_spec(n: int) -> dict:
+    depth = 100
+    chains = []
+    for c in range(max(n // depth, 1)):
+        node: dict = {"class": TextToken, "text": f"leaf{c}", "action": act_nop}
+        for d in reversed(range(depth - 1)):
+            node = {"class": TextToken, "text": f"d{d}", "leaves": [node]}
+        node["text"] = f"chain{c}"
+        chains.append(node)
+    return {"class": TextToken, "text": "deep", "leaves": chains}
+
+
+def typed_spec(n: int) -> dict:
+    def typed_leaves() -> list[dict]:
+        return [
+            {"class": IntToken, "action": act_nop},
+            {"class": IPv4AddressToken, "action": act_nop},
+            {"class": IPv6NetworkToken, "action": act_nop},
+            {"class": ChoiceToken, "choices": ["on", "off"], "action": act_nop},
+            {"class": StringToken, "mark": "<name>", "action": act_nop},
+        ]
+
+    return {
+        "class": TextToken,
+        "text": "set",
+        "leaves": [
+            {"class": TextToken, "text": f"obj{i}", "leaves": typed_leaves()}
+            for i in range(max(n // 6, 1))
+        ],
+    }
+
+
+def cyclic_tree(n: int) -> Token:
+    """Option graph having about n leaves in total. Each option value
+    leads to the target and all the options, like ping in cli.py."""
+    count = max(int(n**0.5) // 2, 1)
+    root = TextToken(text="ping", desc="ping")
+    target = StringToken(mark="<target>", action=act_nop)
+    options = [TextToken(text=f"opt{i}") for i in range(count)]
+    values = [IntToken(action=act_nop) for _ in range(count)]
+    root.append(target, *options)
+    target.append(*options)
+    for option, value in zip(options, values):
+        option.append(value)
+        value.append(target, *options)
+    return root
+
+
+def count_nodes(root: Token) -> int:
+    seen = set()
+    stack = [root]
+    while stack:
+        token = stack.pop()
+        if id(token) in seen:
+            continue
+        seen.add(id(token))
+        stack += token.leaves
+    return len(seen)
+
+
+def lines(kind: str, n: int) -> list[str]:
+    if kind == "wide":
+        return [f"show knob{i}" for i in range(0, n, max(n // 1000, 1))]
+    if kind == "deep":
+        path = " ".join(f"d{d}" for d in range(1, 99))
+        return [f"deep chain{c} {path} leaf{c}" for c in range(max(n // 100, 1))]
+    if kind == "typed":
+        objs = max(n // 6, 1)
+        values = ["100", "10.0.0.1", "2001:db8::/64", "on", "name"]
+        return [f"set obj{i % objs} {values[i % 5]}" for i in range(1000)]
+    if kind == "cyclic":
+        count = max(int(n**0.5) // 2, 1)
+        return [
+            f"ping opt{i % count} 1 opt{(i + 1) % count} 2 example.com" for i in range(1000)
+        ]
+    raise ValueError(kind)
+
+
+def build(kind: str, n: int) -> Token:
+    if kind == "wide":
+        return instantiate(wide_spec(n))
+    if kind == "deep":
+        return instantiate(deep_spec(n))
+    if kind == "typed":
+        return instantiate(typed_spec(n))
+    if kind == "cyclic":
+        return cyclic_tree(n)
+    raise ValueError(kind)
+
+
+def timeit(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Returns the best elapsed seconds of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate() -> float:
+    """Returns elapsed seconds of a fixed workload, used to scale the
+    comparison by the speed of the machine."""
+
+    def work():
+        d = {}
+        for i in range(200000):
+            d[f"k{i}"] = i
+        sorted(d, key=d.get)
+
+    return timeit(work)
+
+
+def bench(kind: str, n: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+
+    tracemalloc.start()
+    root = build(kind, n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(root)
+    results["nodes"] = nodes
+    results["memory_bytes_per_node"] = peak / nodes
+
+    results["instantiate_sec"] = timeit(lambda: build(kind, n))
+
+    def append():
+        token = TextToken(text="append")
+        for i in range(n):
+            token.append(TextToken(text=f"a{i}"))
+
+    results["append_sec"] = timeit(append)
+
+    cli = CLI(file=io.StringIO())
+    cli.append(root)
+    paths = [line.split() for line in lines(kind, n)]
+
+    def longest_match():
+        for path in paths:
+            cli.longest_match(path)
+
+    results["longest_match_usec"] = timeit(longest_match) / len(paths) * 1e6
+
+    # readline requests every candidate with incremented state, so a
+    # sample of lines is completed.
+    samples = paths[:: max(len(paths) // 100, 1)]
+
+    def complete():
+        for path in samples:
+            line = " ".join(path[:-1]) + " " + path[-1][:1]
+            state = 0
+            while cli.complete(line, path[-1][:1], state) is not None:
+                state += 1
+
+    results["complete_usec"] = timeit(complete) / len(samples) * 1e6
+
+    buf = lines(kind, n)
+    report = cli.execute_stream(buf)
+    results["execute_lines_per_sec"] = report.throughput
+
+    matcher = cli.compile()
+
+    def validate():
+        for _ in matcher.validate(buf):
+            pass
+
+    results["validate_lines_per_sec"] = len(buf) / timeit(validate)
+
+    return results
+
+
+# metrics where larger values are better.
+HIGHER_IS_BETTER = {"execute_lines_per_sec", "validate_lines_per_sec"}
+
+# metrics not depending on the speed of the machine.
+MEMORY = {"memory_bytes_per_node"}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    speed = results["calibration_sec"] / baseline["calibration_sec"]
+    print()
+    print(f"machine speed ratio to the baseline: {speed:.2f}")
+    print("{:40} {:>14} {:>14} {:>8}".format("metric", "baseline", "current", "ratio"))
+    for key, value in results.items():
+        if key not in baseline or "/" not in key or key.endswith("/nodes"):
+            continue
+        base = baseline[key]
+        metric = key.split("/")[-1]
+        if metric in HIGHER_IS_BETTER:
+            ratio = base / value if value else float("inf")
+        else:
+            ratio = value / base if base else float("inf")
+        if metric not in MEMORY:
+            ratio /= speed
+        mark = ""
+        if ratio > threshold:
+            mark = "  REGRESSION"
+            regressions.append(key)
+        print("{:40} {:14.3f} {:14.3f} {:8.2f}{}".format(key, base, value, ratio, mark))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="1000,10000,100000", help="comma separated number of nodes"
+    )
+    parser.add_argument(
+        "--kinds", default="wide,deep,typed,cyclic", help="comma separated tree kinds"
+    )
+    parser.add_argument("--save", help="store results to this baseline file")
+    parser.add_argument("--compare", help="compare results with this baseline file")
+    parser.add_argument(
+        "--threshold", type=float, default=1.5, help="allowed slowdown ratio"
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="exit with 1 if regressions are found"
+    )
+    args = parser.parse_args()
+
+    results: dict[str, float] = {"calibration_sec": calibrate()}
+    for kind in args.kinds.split(","):
+        for n in map(int, args.sizes.split(",")):
+            for metric, value in bench(kind, n).items():
+                key = f"{kind}/{n}/{metric}"
+                results[key] = value
+                print("{:40} {:14.3f}".format(key, value), flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x")
+            if args.strict:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
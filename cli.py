@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
-from subprocess import check_output
+from subprocess import Popen, PIPE
+from typing import Iterator
 import platform
 import socket
 import sys
@@ -45,55 +46,61 @@ def act_cli_exit(priv, args):
     raise EOFError
 
 
+def command_lines(args: list[str]) -> Iterator[str]:
+    """Yields output lines of the command while it runs. The command
+    is killed if the generator is closed early, e.g., by quitting the
+    pager."""
+    p = Popen(args, stdout=PIPE, text=True)
+    try:
+        assert p.stdout
+        yield from p.stdout
+    finally:
+        if p.poll() is None:
+            p.kill()
+        p.wait()
+        if p.stdout:
+            p.stdout.close()
+
+
 def act_show_interfaces(priv, args):
-    print(check_output(["ifconfig"], text=True))
+    return command_lines(["ifconfig"])
 
 
 def act_show_interfaces_interface(priv, args):
-    print(check_output(["ifconfig", args.pop()], text=True))
+    return command_lines(["ifconfig", args.pop()])
 
 
 def act_show_system(priv, args):
-    print(check_output(["uname", "-a"], text=True))
+    return command_lines(["uname", "-a"])
 
 
 def act_show_system_version(priv, args):
     os = platform.system()
     if os == "Darwin":
-        print(check_output(["sw_vers"], text=True))
+        return command_lines(["sw_vers"])
     elif os == "Linux":
-        print(check_output(["lsb_release", "-a"], text=True))
+        return command_lines(["lsb_release", "-a"])
 
 
 def act_show_ip_route(priv, args):
     os = platform.system()
     if os == "Darwin":
-        print(check_output(["netstat", "-rnfinet"], text=True))
+        return command_lines(["netstat", "-rnfinet"])
     elif os == "Linux":
-        print(check_output(["ip", "route", "show"], text=True))
+        return command_lines(["ip", "route", "show"])
 
 
-def act_ping(priv, args: list[str]):
-    cmd = ["ping"]
-    option_idx = []
-    for idx, key in enumerate(args):
-        if key == "count":
-            cmd += ["-c", args[idx + 1]]
-            option_idx += [idx, idx + 1]
-        elif key == "wait":
-            cmd += ["-W", args[idx + 1]]
-            option_idx += [idx, idx + 1]
-
-    for i in sorted(option_idx, reverse=True):
-        args.pop(i)  # remove ping options from args
-
-    target = args.pop()
-    if target == "ping":
-        # All options removed, then the text is 'ping'. this means
-        # <targe> is not specified.
+def act_ping(priv, args, target=None, count=None, wait=None):
+    # target, count, and wait are values of tokens named so.
+    if target is None:
         print("<target> must be specified")
         return
 
+    cmd = ["ping"]
+    if count is not None:
+        cmd += ["-c", str(count)]
+    if wait is not None:
+        cmd += ["-W", str(wait)]
     cmd.append(target)
 
     fork_and_exec(cmd)
@@ -103,9 +110,11 @@ def act_print_args(priv, args):
     print(f"execute command for: {args}")
 
 
-def main():
+def build_cli() -> CLI:
+    """Returns the CLI of this example, also used by `python3 -m nosh
+    cli:build_cli show system`."""
 
-    cli = CLI(prompt_cb=prompt_cb)
+    cli = CLI(prompt_cb=prompt_cb, abbrev=True)
 
     show_tokens = {
         "class": TextToken,
@@ -238,6 +247,7 @@ def main():
                 "mark": "<Number>",
                 "desc": "Number of ping requests",
                 "action": act_ping,
+                "name": "count",
             }
         ],
     }
@@ -254,6 +264,7 @@ def main():
                 "mark": "<Second>",
                 "desc": "Seconds for waiting ping response",
                 "action": act_ping,
+                "name": "wait",
             }
         ],
     }
@@ -264,6 +275,7 @@ def main():
         "mark": "<target>",
         "desc": "Ping target",
         "action": act_ping,
+        "name": "target",
     }
     tn = nosh.instantiate(ping_target_token)
 
@@ -278,7 +290,15 @@ def main():
     cli.append(TextToken(text="exit", desc="Exit from CLI", action=act_cli_exit))
     cli.append(TextToken(text="quit", desc="Exit from CLI", action=act_cli_exit))
 
-    cli.cli()
+    # show cli statistics/caches/slowest
+    cli.enable_metrics()
+    cli.enable_introspection()
+
+    return cli
+
+
+def main():
+    build_cli().cli()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
 from .nosh import *
 from .token import *
+from .interface import *
 from ._version import __version__
@@ -0,0 +1,53 @@
+"""Executes a command of a CLI without the interactive shell.
+
+    python3 -m nosh MODULE:ATTR WORD [WORD ...]
+
+ATTR of MODULE is a CLI, or a function returning a CLI. The WORDs are
+matched against the token tree by ``CLI.run_argv()``, and the exit
+status is 0 on success, 1 if the action failed, and 2 if the WORDs
+are not a command. For example::
+
+    python3 -m nosh cli:build_cli show system version
+
+"""
+
+from __future__ import annotations
+
+import sys
+import importlib
+
+from .nosh import CLI, EXIT_SYNTAX
+
+
+def load(spec: str) -> CLI:
+    """Returns the CLI specified by ``MODULE:ATTR``."""
+    module, _, attr = spec.partition(":")
+    if not module or not attr:
+        raise ValueError(f"{spec}: must be MODULE:ATTR")
+    obj = importlib.import_module(module)
+    for name in attr.split("."):
+        obj = getattr(obj, name)
+    if not isinstance(obj, CLI) and callable(obj):
+        obj = obj()
+    if not isinstance(obj, CLI):
+        raise ValueError(f"{spec}: not a CLI")
+    return obj
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        print(__doc__, file=sys.stderr)
+        return EXIT_SYNTAX
+
+    try:
+        cli = load(argv[0])
+    except (ImportError, AttributeError, ValueError) as e:
+        print(f"nosh: {e}", file=sys.stderr)
+        return EXIT_SYNTAX
+    return cli.run_argv(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
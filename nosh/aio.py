@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+# the event loop running CLI.acli(). Awaitables returned by completion
+# sources are run on this loop.
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def attach(loop: asyncio.AbstractEventLoop):
+    """Sets the event loop on which awaitables are resolved."""
+    global _loop
+    _loop = loop
+
+
+def detach():
+    """Clears the event loop set by ``attach()``."""
+    global _loop
+    _loop = None
+
+
+def isawaitable(value: Any) -> bool:
+    return hasattr(value, "__await__")
+
+
+async def _await(aw: Awaitable) -> Any:
+    return await aw
+
+
+def resolve(value: Any) -> Any:
+    """Returns `value`, or the result of `value` if it is awaitable.
+
+    When an event loop is attached and running in another thread,
+    e.g., completion is called from ``input()`` running in an executor
+    of ``CLI.acli()``, the awaitable runs on the loop and this function
+    blocks until it finishes. Otherwise, the awaitable runs by
+    ``asyncio.run()``.
+
+    """
+    if not isawaitable(value):
+        return value
+
+    import asyncio
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("cannot resolve an awaitable in an event loop thread")
+
+    loop = _loop
+    if loop and loop.is_running():
+        return asyncio.run_coroutine_threadsafe(_await(value), loop).result()
+    return asyncio.run(_await(value))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import TextIO, Iterator
+
+import sys
+import threading
+from contextlib import contextmanager
+
+
+class ThreadLocalStdout:
+    """File object replacing ``sys.stdout`` to redirect output of
+    specific threads.
+
+    Writes from a thread that redirects its output by
+    ``redirect_stdout()`` go to the redirected file. Writes from the
+    other threads go to the original stdout.
+    """
+
+    def __init__(self, stdout: TextIO):
+        self.stdout = stdout
+        self._local = threading.local()
+
+    @property
+    def target(self) -> TextIO:
+        return getattr(self._local, "file", None) or self.stdout
+
+    def write(self, s: str) -> int:
+        return self.target.write(s)
+
+    def flush(self):
+        self.target.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.target, name)
+
+
+def _install() -> ThreadLocalStdout:
+    if not isinstance(sys.stdout, ThreadLocalStdout):
+        sys.stdout = ThreadLocalStdout(sys.stdout)
+    return sys.stdout
+
+
+@contextmanager
+def redirect_stdout(file: TextIO) -> Iterator[TextIO]:
+    """Redirects ``sys.stdout`` of the current thread to `file`.
+    Unlike ``contextlib.redirect_stdout()``, output of other threads is
+    not redirected.
+
+    """
+    proxy = _install()
+    prev = getattr(proxy._local, "file", None)
+    proxy._local.file = file
+    try:
+        yield file
+    finally:
+        proxy._local.file = prev
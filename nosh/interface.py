@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+
+
+class Link:
+    """Link represents an interface of this host.
+
+    :param name: Interface name.
+    :param index: Interface index, 0 if unknown.
+    :param alias: Interface alias (description).
+    :param operstate: Operational state, e.g., ``up`` and ``down``.
+    """
+
+    def __init__(self, name: str, index: int = 0, alias: str = "", operstate: str = ""):
+        self.name = name
+        self.index = index
+        self.alias = alias
+        self.operstate = operstate
+
+    def __repr__(self):
+        return (
+            f"Link(name={self.name!r}, index={self.index}, "
+            f"alias={self.alias!r}, operstate={self.operstate!r})"
+        )
+
+    def describe(self) -> str:
+        """Returns a description of this link for completion."""
+        return ", ".join(filter(None, [self.operstate, self.alias]))
+
+
+class InterfaceBackend(ABC):
+    """Super class for backends retrieving interfaces of this host.
+
+    Backends implement ``links()``. A backend that knows when links
+    change sets `notifies` True and implements ``changed()``, then
+    InterfaceCache reloads links only when ``changed()`` returns True.
+    """
+
+    notifies = False
+
+    @abstractmethod
+    def links(self) -> list[Link]:
+        """Returns links of this host."""
+        pass
+
+    def changed(self) -> bool:
+        """Returns True if links have changed since the last call."""
+        return False
+
+
+class SysfsBackend(InterfaceBackend):
+    """InterfaceBackend listing ``/sys/class/net``."""
+
+    def links(self) -> list[Link]:
+        return [Link(name) for name in os.listdir("/sys/class/net")]
+
+
+class IfaddrBackend(InterfaceBackend):
+    """InterfaceBackend retrieving adapters by ``ifaddr``."""
+
+    def links(self) -> list[Link]:
+        import ifaddr
+
+        return [Link(a.name, index=a.index or 0) for a in ifaddr.get_adapters()]
+
+
+def default_backend() -> InterfaceBackend:
+    """Returns NetlinkBackend on Linux. Otherwise, SysfsBackend if
+    ``/sys/class/net`` exists or IfaddrBackend, which NetlinkBackend
+    also falls back to on netlink errors."""
+    import socket
+
+    if os.path.exists("/sys/class/net"):
+        fallback: InterfaceBackend = SysfsBackend()
+    else:
+        fallback = IfaddrBackend()
+    if hasattr(socket, "AF_NETLINK"):
+        from .netlink import NetlinkBackend
+
+        backend = NetlinkBackend(fallback)
+        try:
+            backend.subscribe()
+            return backend
+        except OSError:
+            pass
+    return fallback
+
+
+class InterfaceCache:
+    """Process-wide cache of interfaces.
+
+    InterfaceCache holds the sorted interface names and links of this
+    host retrieved by `backend`, and reloads them when the backend
+    notifies changes, `ttl` seconds have passed (for backends without
+    notification), or ``invalidate()`` is called. `generation` is
+    incremented whenever the names change, so that users of the cache
+    (e.g., InterfaceToken) can memoize views derived from the names.
+
+    :param backend: InterfaceBackend. ``default_backend()`` if None.
+    :param ttl: Seconds that loaded interface names are valid.
+    """
+
+    def __init__(self, backend: InterfaceBackend | None = None, ttl: float = 1.0):
+        self._backend = backend
+        self.ttl = ttl
+        self.generation = 0
+        self._names: list[str] = []
+        self._links: dict[str, Link] = {}
+        self._expire = 0.0
+
+        # number of _refresh() served by the loaded names (hits) and
+        # by reloading from the backend (misses).
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self) -> InterfaceBackend:
+        if not self._backend:
+            self._backend = default_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend: InterfaceBackend):
+        self._backend = backend
+        self.invalidate()
+
+    def _refresh(self):
+        backend = self.backend
+        now = time.monotonic()
+        if not backend.changed() and now < self._expire:
+            self.hits += 1
+            return
+        self.misses += 1
+        links = backend.links()
+        names = sorted([link.name for link in links])
+        self._links = {link.name: link for link in links}
+        if names != self._names:
+            self._names = names
+            self.generation += 1
+        self._expire = math.inf if backend.notifies else now + self.ttl
+
+    def names(self) -> list[str]:
+        """Returns the sorted list of interface names."""
+        self._refresh()
+        return self._names
+
+    def links(self) -> dict[str, Link]:
+        """Returns a dict of interface names and their Links."""
+        self._refresh()
+        return self._links
+
+    def invalidate(self):
+        """Invalidates the loaded names. The next ``names()`` reloads
+        interface names."""
+        self._expire = 0.0
+
+
+interface_cache = InterfaceCache()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Any, TYPE_CHECKING
+
+import sys
+from collections import deque
+
+from .token import Token, BasicToken, TextToken
+from .interface import interface_cache
+from .metrics import token_path
+
+if TYPE_CHECKING:
+    from .nosh import CLI
+
+
+def _leaves(token: Token) -> list[Token]:
+    # do not materialize deferred leaves only to count them.
+    if isinstance(token, BasicToken):
+        return token._leaves
+    return token.leaves
+
+
+def estimate_memory(token: Token) -> int:
+    """Returns the estimated size of `token` in bytes: the object, its
+    attributes dict, and the containers and strings it holds. Leaf
+    tokens are not included."""
+    size = sys.getsizeof(token)
+    attrs = getattr(token, "__dict__", None)
+    if attrs is not None:
+        size += sys.getsizeof(attrs)
+        for value in attrs.values():
+            if isinstance(value, (str, list, tuple, dict, set)):
+                size += sys.getsizeof(value)
+    return size
+
+
+class TreeStats:
+    """Statistics of a token tree computed by ``tree_stats()``.
+
+    `depth` is the largest number of words to reach a token by the
+    shortest path, and `shared` is the number of edges to tokens
+    already reached by another path, e.g., cycles of ping options.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.edges = 0
+        self.shared = 0
+        self.depth = 0
+        self.fanout = 0
+        self.fanout_path = ""
+        self.deferred = 0
+        self.memory = 0
+        self.classes: dict[str, int] = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "shared": self.shared,
+            "depth": self.depth,
+            "fanout": self.fanout,
+            "fanout_path": self.fanout_path,
+            "deferred": self.deferred,
+            "memory": self.memory,
+            "classes": dict(self.classes),
+        }
+
+
+def tree_stats(root: Token) -> TreeStats:
+    """Walks the token tree under `root` breadth first, and returns its
+    TreeStats. Each token is counted once even if the tree has cycles,
+    and deferred subtrees are counted but not materialized."""
+    stats = TreeStats()
+    seen = {id(root)}
+    queue: deque[tuple[Token, int, tuple[Token, ...]]] = deque([(root, 0, ())])
+    while queue:
+        token, depth, path = queue.popleft()
+        stats.nodes += 1
+        stats.depth = max(stats.depth, depth)
+        stats.memory += estimate_memory(token)
+        name = token.__class__.__name__
+        stats.classes[name] = stats.classes.get(name, 0) + 1
+        stats.deferred += len(getattr(token, "_pending", ()))
+
+        leaves = _leaves(token)
+        if len(leaves) > stats.fanout:
+            stats.fanout = len(leaves)
+            stats.fanout_path = token_path(path)
+        for leaf in leaves:
+            stats.edges += 1
+            if id(leaf) in seen:
+                stats.shared += 1
+                continue
+            seen.add(id(leaf))
+            queue.append((leaf, depth + 1, path + (leaf,)))
+    return stats
+
+
+class Introspection:
+    """Actions of ``show cli`` commands registered by
+    ``CLI.enable_introspection()``.
+
+    :param cli: CLI to be reported.
+    """
+
+    def __init__(self, cli: CLI):
+        self.cli = cli
+
+    def tokens(self) -> Token:
+        """Returns the ``cli`` token having ``statistics``, ``caches``,
+        and ``slowest`` leaves."""
+        cli = TextToken(text="cli", desc="Show CLI information")
+        cli.append(
+            TextToken(
+                text="statistics",
+                desc="Show statistics of the token tree",
+                action=self.act_statistics,
+            ),
+            TextToken(
+                text="caches", desc="Show hit rates of caches", action=self.act_caches
+            ),
+            TextToken(
+                text="slowest",
+                desc="Show the slowest commands",
+                action=self.act_slowest,
+            ),
+        )
+        return cli
+
+    def _pr(self, msg: str):
+        print(msg, file=self.cli.file)
+
+    def act_statistics(self, priv: Any, args: list[str]):
+        stats = tree_stats(self.cli.root)
+        self._pr("  {:20} {}".format("Nodes:", stats.nodes - 1))  # except root
+        self._pr("  {:20} {}".format("Edges:", stats.edges))
+        self._pr("  {:20} {}".format("Shared edges:", stats.shared))
+        self._pr("  {:20} {}".format("Depth:", stats.depth))
+        self._pr(
+            "  {:20} {} ({})".format(
+                "Widest fan-out:", stats.fanout, stats.fanout_path or "top"
+            )
+        )
+        self._pr("  {:20} {}".format("Deferred subtrees:", stats.deferred))
+        self._pr("  {:20} {} bytes".format("Estimated memory:", stats.memory))
+        self._pr("  Tokens per class:")
+        for name, count in sorted(stats.classes.items(), key=lambda x: -x[1]):
+            self._pr("    {:24} {}".format(name, count))
+
+    def act_caches(self, priv: Any, args: list[str]):
+        session = self.cli._session()
+        caches = [
+            ("parse", session.parse_hits, session.parse_misses),
+            ("complete", session.complete_hits, session.complete_misses),
+            ("interface", interface_cache.hits, interface_cache.misses),
+        ]
+        self._pr("  {:12} {:>10} {:>10} {:>9}".format("Cache", "Hits", "Misses", "Hit rate"))
+        for name, hits, misses in caches:
+            total = hits + misses
+            rate = "{:.1%}".format(hits / total) if total else "-"
+            self._pr("  {:12} {:>10} {:>10} {:>9}".format(name, hits, misses, rate))
+
+    def act_slowest(self, priv: Any, args: list[str]):
+        if not self.cli.metrics:
+            self._pr("  metrics are not enabled")
+            return
+        self._pr("  {:>12}  {}".format("Elapsed(ms)", "Command"))
+        for item in self.cli.metrics.slowest():
+            self._pr("  {:12.3f}  {}".format(item["elapsed"] * 1000, item["line"]))
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import Callable, Any
+
+import io
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from . import aio
+from .capture import redirect_stdout
+from .nosh import _is_lines, _is_alines
+
+
+_local = threading.local()
+
+
+def current_job() -> Job | None:
+    """Returns the Job running in the current thread, if any."""
+    return getattr(_local, "job", None)
+
+
+class Job:
+    """Job represents a command executed in background.
+
+    `output` holds what the action wrote to ``sys.stdout``. `killed`
+    is set by ``JobManager.kill()``; long running actions can check it
+    to stop cooperatively.
+    """
+
+    def __init__(self, id: int, line: str):
+        self.id = id
+        self.line = line
+        self.output = io.StringIO()
+        self.killed = threading.Event()
+        self.future: Future | None = None
+        # True if listed as finished by the ``jobs`` command.
+        self.notified = False
+
+    @property
+    def state(self) -> str:
+        assert self.future
+        if self.future.cancelled():
+            return "Killed"
+        if self.future.running():
+            return "Killing" if self.killed.is_set() else "Running"
+        if not self.future.done():
+            return "Pending"
+        if self.killed.is_set():
+            return "Killed"
+        if self.future.exception():
+            return "Failed"
+        return "Done"
+
+    def __str__(self):
+        return "[{}] {:8} {}".format(self.id, self.state, self.line)
+
+
+class JobManager:
+    """JobManager runs actions in a bounded thread pool.
+
+    :param max_workers: Number of actions running simultaneously.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nosh-job"
+        )
+        self.jobs: dict[int, Job] = {}
+        self._next_id = 1
+
+    def submit(
+        self, line: str, action: Callable[[Any, list[str]], Any], private: Any, args: list[str]
+    ) -> Job:
+        """Submits `action` called with `private` and `args`."""
+        job = Job(self._next_id, line)
+        self._next_id += 1
+
+        def run():
+            _local.job = job
+            try:
+                with redirect_stdout(job.output):
+                    ret = aio.resolve(action(private, args))
+                    # iterator of lines, streamed until killed
+                    if _is_lines(ret):
+                        from .pager import stream
+
+                        stream(ret, job.output, stop=job.killed.is_set)
+                    elif _is_alines(ret):
+                        from .pager import astream
+
+                        aio.resolve(astream(ret, job.output, stop=job.killed.is_set))
+            finally:
+                _local.job = None
+
+        # run in a copy of the current context to keep the Session
+        job.future = self.executor.submit(contextvars.copy_context().run, run)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, id: int | None = None) -> Job | None:
+        """Returns Job of `id`, or the latest Job if `id` is None."""
+        if id is None:
+            return self.jobs[max(self.jobs)] if self.jobs else None
+        return self.jobs.get(id)
+
+    def wait(self, job: Job) -> BaseException | None:
+        """Waits for `job` to finish, removes it, and returns the
+        exception raised by the action if any."""
+        assert job.future
+        try:
+            job.future.result()
+            return None
+        except Exception as e:
+            return e
+        finally:
+            self.jobs.pop(job.id, None)
+
+    def kill(self, job: Job) -> bool:
+        """Kills `job`. A pending job is cancelled immediately. A
+        running job cannot be interrupted, so it is marked killed and
+        actions stop by checking ``current_job().killed``. Returns
+        False if the job has already finished.
+
+        """
+        assert job.future
+        if job.future.done():
+            return False
+        job.killed.set()
+        job.future.cancel()
+        return True
+
+    def reap(self, notified: bool = False) -> list[Job]:
+        """Removes finished jobs and returns them. If `notified` is
+        True, only the jobs already listed as finished are removed."""
+        done = [
+            job
+            for job in self.jobs.values()
+            if job.future and job.future.done() and (job.notified or not notified)
+        ]
+        for job in done:
+            del self.jobs[job.id]
+        return done
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from .token import (
+    Token,
+    BasicToken,
+    TextToken,
+    StringToken,
+    IntToken,
+    FloatToken,
+    IPv4AddressToken,
+    IPv6AddressToken,
+    IPAddressToken,
+    InterfaceAddressToken,
+    IPv4NetworkToken,
+    IPv6NetworkToken,
+    ChoiceToken,
+)
+
+if TYPE_CHECKING:
+    from .nosh import CLI
+
+
+# Token classes whose match() depends only on the text and the
+# arguments given at init. Transitions over their leaves are
+# memoized. Subclasses may override match(), so that exact types are
+# compared.
+PURE_CLASSES = {
+    TextToken,
+    StringToken,
+    IntToken,
+    FloatToken,
+    IPv4AddressToken,
+    IPv6AddressToken,
+    IPAddressToken,
+    InterfaceAddressToken,
+    IPv4NetworkToken,
+    IPv6NetworkToken,
+    ChoiceToken,
+}
+
+# maximum memoized transitions of a state. typed words, e.g.,
+# addresses, are mostly unique, so that the memo must not grow with
+# the number of lines.
+MEMO_SIZE = 4096
+
+_MISS = -1
+
+
+class _State:
+    __slots__ = ("accept", "static", "memo")
+
+    def __init__(self, token: Token):
+        self.accept = token.action is not None
+        # words of static TextToken leaves -> state ids, which are
+        # used without trying dynamic leaves.
+        self.static: dict[str, int] = {}
+        # word -> state id or _MISS for the other words. None if a
+        # leaf is not pure, e.g., InterfaceToken, that is, the words
+        # must be matched every time by match_leaf().
+        self.memo: dict[str, int] | None = {}
+
+
+class Matcher:
+    """Matcher validates and classifies lines in bulk, e.g., lines of
+    a large configuration file, without executing them.
+
+    The token tree of `cli` is compiled into a table of states, one
+    per Token, on demand. A state maps words of static TextToken
+    leaves to the next states with a dict lookup, and memoizes
+    transitions over typed leaves, e.g., IntToken, per word. States
+    having leaves whose matches may change, e.g., InterfaceToken or
+    Token classes defined outside nosh, fall back to
+    ``Token.match_leaf()`` for each word. The table is rebuilt when the
+    token tree or `abbrev` of the CLI is changed.
+
+    Lines are matched as ``CLI.execute()`` does, including `prefix`
+    and abbreviations of the CLI, but output pipes and ``&`` are not
+    supported.
+
+    :param cli: CLI whose token tree is compiled.
+    """
+
+    def __init__(self, cli: CLI):
+        self.cli = cli
+        # states are compiled when they are reached first, so that
+        # deferred leaves are not materialized by compiling.
+        self._tokens: list[Token] = []
+        self._states: list[_State | None] = []
+        self._ids: dict[int, int] = {}
+        self._generation = -1
+        # memoized transitions include abbreviations if cli.abbrev.
+        self._abbrev = cli.abbrev
+
+    def _reset(self):
+        self._tokens = []
+        self._states = []
+        self._ids = {}
+        self._generation = BasicToken.generation
+        self._abbrev = self.cli.abbrev
+        self._id(self.cli.root)
+
+    def _id(self, token: Token) -> int:
+        sid = self._ids.get(id(token))
+        if sid is None:
+            sid = len(self._tokens)
+            self._ids[id(token)] = sid
+            self._tokens.append(token)
+            self._states.append(None)
+        return sid
+
+    def _compile(self, sid: int) -> _State:
+        token = self._tokens[sid]
+        state = _State(token)
+        self._states[sid] = state
+        if (
+            not isinstance(token, BasicToken)
+            or type(token).match_leaf is not BasicToken.match_leaf
+        ):
+            # leaves are matched by the match_leaf() of the token.
+            state.memo = None
+            return state
+
+        generation = BasicToken.generation
+        leaves = token.leaves
+        if generation != BasicToken.generation and generation == self._generation:
+            # deferred leaves of this token were materialized, which
+            # does not change the states compiled so far.
+            self._generation = BasicToken.generation
+
+        statics: dict[str, Token] = {}
+        dynamic = None
+        for leaf in leaves:
+            if BasicToken._is_static(leaf):
+                cur = statics.get(leaf.text)
+                if cur is None or leaf.priority < cur.priority:
+                    statics[leaf.text] = leaf
+                continue
+            if type(leaf) not in PURE_CLASSES:
+                state.memo = None
+            if dynamic is None or leaf.priority < dynamic:
+                dynamic = leaf.priority
+        # a static leaf is used without trying dynamic leaves unless a
+        # dynamic leaf precedes it, see BasicToken.match_leaf().
+        for text, leaf in statics.items():
+            if dynamic is None or leaf.priority <= dynamic:
+                state.static[text] = self._id(leaf)
+        return state
+
+    def _next(self, sid: int, word: str) -> int:
+        """Returns the state id reached from `sid` by `word` matching a
+        dynamic leaf or abbreviating a static leaf, or _MISS."""
+        state = self._states[sid] or self._compile(sid)
+        memo = state.memo
+        if memo is not None:
+            nxt = memo.get(word)
+            if nxt is not None:
+                return nxt
+        token = self._tokens[sid]
+        leaf = token.match_leaf(word)
+        if not leaf and self.cli.abbrev:
+            texts = token.expand(word)
+            if len(texts) == 1:
+                leaf = token.match_leaf(texts[0])
+        nxt = self._id(leaf) if leaf else _MISS
+        if memo is not None and len(memo) < MEMO_SIZE:
+            memo[word] = nxt
+        return nxt
+
+    def match(self, line: str) -> Token | None:
+        """Returns the Token executed for `line`, or None if `line`
+        does not match a command."""
+        if (
+            self._generation != BasicToken.generation
+            or self._abbrev != self.cli.abbrev
+        ):
+            self._reset()
+        words = line.split()
+        if not words:
+            return None
+        if line[0].isspace() and not self.cli.root.match_leaf(""):
+            # CLI.execute() matches the empty first word
+            return None
+        prefix = self.cli.prefix
+        if prefix:
+            words = words[:1] + prefix + words[1:]
+        states = self._states
+        sid = 0
+        for word in words:
+            # the static lookup of _next() is inlined for speed.
+            state = states[sid] or self._compile(sid)
+            nxt = state.static.get(word)
+            sid = self._next(sid, word) if nxt is None else nxt
+            if sid == _MISS:
+                return None
+        state = states[sid] or self._compile(sid)
+        return self._tokens[sid] if state.accept else None
+
+    def validate(self, lines: Iterable[str | bytes]) -> Iterator[tuple[int, str]]:
+        """Yields (line number, line) of lines in `lines` that do not
+        match a command. Empty lines are ignored."""
+        for lineno, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode()
+            line = line.rstrip("\r\n")
+            if line.strip() and not self.match(line):
+                yield lineno, line
+
+    def classify(self, lines: Iterable[str | bytes]) -> dict[Token | None, int]:
+        """Returns the number of lines in `lines` for each Token
+        executed by the lines. Lines that do not match a command are
+        counted for None. Empty lines are ignored."""
+        counts: dict[Token | None, int] = {}
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode()
+            if not line.strip():
+                continue
+            token = self.match(line)
+            counts[token] = counts.get(token, 0) + 1
+        return counts
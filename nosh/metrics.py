@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import os
+import time
+import heapq
+import bisect
+import threading
+from contextlib import contextmanager
+
+from .token import Token
+
+# upper bounds of histogram buckets in seconds.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+PHASES = ("parse", "action", "complete")
+
+# errors in parse and completion are syntax errors, and errors in
+# action are exceptions raised by actions.
+ERROR_KINDS = {"parse": "syntax", "complete": "syntax", "action": "action"}
+
+
+def token_path(tokens: Iterable[Token]) -> str:
+    """Returns the label of matched `tokens`, e.g., ``show interface
+    <interface-name>``. Tokens with a mark are labeled by the mark, so
+    that arguments do not make labels unbounded."""
+    return " ".join(getattr(t, "mark", "") or t.text for t in tokens)
+
+
+class Histogram:
+    """Histogram of latencies in seconds.
+
+    :param buckets: Sorted upper bounds of buckets.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Returns (upper bound, cumulative count) of the buckets."""
+        buckets = []
+        total = 0
+        for le, count in zip(list(map(str, self.buckets)) + ["+Inf"], self.counts):
+            total += count
+            buckets.append((le, total))
+        return buckets
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "max": self.max,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Metrics collects latencies and errors of a CLI.
+
+    Latencies of parse, action, and completion are recorded in
+    histograms per token path, e.g., ``show interface
+    <interface-name>``. Errors are counted per kind, ``syntax`` or
+    ``action``, token path, and exception class. Metrics is enabled by
+    ``CLI.enable_metrics()``, and is safe to be updated from multiple
+    threads, e.g., background jobs and CLIServer sessions.
+
+    :param complete_budget: Keystroke latency budget in seconds.
+        Completions slower than this are counted.
+    :param slowest: Number of the slowest commands to keep.
+    :param buckets: Upper bounds of histogram buckets in seconds.
+    """
+
+    def __init__(
+        self,
+        complete_budget: float = 0.05,
+        slowest: int = 10,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.complete_budget = complete_budget
+        self.buckets = buckets
+        self._slowest_max = slowest
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears all the metrics."""
+        with self._lock:
+            self.started = time.time()
+            self.histograms: dict[tuple[str, str], Histogram] = {}
+            self.errors: dict[tuple[str, str, str], int] = {}
+            self.budget_exceeded = 0
+            # min-heap of (elapsed, seq, path, line)
+            self._slowest: list[tuple[float, int, str, str]] = []
+            self._seq = 0
+
+    def observe(self, phase: str, path: str, elapsed: float, line: str = ""):
+        """Records `elapsed` seconds of `phase` for the token `path`.
+        `line` is the command line of an action."""
+        if phase not in PHASES:
+            raise ValueError(f"invalid phase {phase}")
+        with self._lock:
+            hist = self.histograms.get((phase, path))
+            if not hist:
+                hist = self.histograms[(phase, path)] = Histogram(self.buckets)
+            hist.observe(elapsed)
+
+            if phase == "complete" and elapsed > self.complete_budget:
+                self.budget_exceeded += 1
+            elif phase == "action" and self._slowest_max > 0:
+                self._seq += 1
+                item = (elapsed, self._seq, path, line)
+                if len(self._slowest) < self._slowest_max:
+                    heapq.heappush(self._slowest, item)
+                elif elapsed > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, item)
+
+    def error(self, phase: str, path: str, exception: BaseException):
+        """Counts `exception` raised in `phase` for the token `path`."""
+        key = (ERROR_KINDS[phase], path, exception.__class__.__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    @contextmanager
+    def measure(self, phase: str, path: str, line: str = "") -> Iterator[None]:
+        """Records the elapsed time of this context, and counts an
+        exception raised in it. EOFError, which actions raise to exit
+        the CLI, and KeyboardInterrupt are not errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except EOFError:
+            raise
+        except Exception as e:
+            self.error(phase, path, e)
+            raise
+        finally:
+            self.observe(phase, path, time.perf_counter() - start, line)
+
+    def slowest(self) -> list[dict]:
+        """Returns the slowest commands, the slowest first."""
+        with self._lock:
+            items = sorted(self._slowest, reverse=True)
+        return [{"elapsed": e, "path": p, "line": l} for e, _, p, l in items]
+
+    def error_counts(self) -> dict[str, int]:
+        """Returns the number of errors per kind."""
+        counts = {kind: 0 for kind in sorted(set(ERROR_KINDS.values()))}
+        with self._lock:
+            for (kind, _, _), count in self.errors.items():
+                counts[kind] += count
+        return counts
+
+    def snapshot(self) -> dict:
+        """Returns the metrics as a dict."""
+        with self._lock:
+            phases: dict[str, dict[str, dict]] = {phase: {} for phase in PHASES}
+            for (phase, path), hist in sorted(self.histograms.items()):
+                phases[phase][path] = hist.as_dict()
+            errors = [
+                {"kind": kind, "path": path, "exception": exc, "count": count}
+                for (kind, path, exc), count in sorted(self.errors.items())
+            ]
+            budget_exceeded = self.budget_exceeded
+        return {
+            "started": self.started,
+            **phases,
+            "errors": errors,
+            "error_counts": self.error_counts(),
+            "complete_budget": self.complete_budget,
+            "complete_budget_exceeded": budget_exceeded,
+            "slowest": self.slowest(),
+        }
+
+    def prometheus(self, namespace: str = "nosh") -> str:
+        """Returns the metrics in the Prometheus text exposition
+        format."""
+        lines: list[str] = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            errors = sorted(self.errors.items())
+            budget_exceeded = self.budget_exceeded
+
+        for phase in PHASES:
+            name = f"{namespace}_{phase}_seconds"
+            lines.append(f"# HELP {name} Latency of {phase} per token path.")
+            lines.append(f"# TYPE {name} histogram")
+            for (p, path), hist in histograms:
+                if p != phase:
+                    continue
+                label = f'path="{_escape(path)}"'
+                for le, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{{label},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{label}}} {hist.sum}")
+                lines.append(f"{name}_count{{{label}}} {hist.count}")
+
+        name = f"{namespace}_errors_total"
+        lines.append(f"# HELP {name} Errors per kind, token path, and exception.")
+        lines.append(f"# TYPE {name} counter")
+        for (kind, path, exc), count in errors:
+            lines.append(
+                f'{name}{{kind="{kind}",path="{_escape(path)}",exception="{exc}"}} {count}'
+            )
+
+        name = f"{namespace}_complete_budget_exceeded_total"
+        lines.append(f"# HELP {name} Completions slower than the budget.")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {budget_exceeded}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | os.PathLike, namespace: str = "nosh"):
+        """Writes ``prometheus()`` to `path` atomically, e.g., for the
+        textfile collector of node_exporter."""
+        tmp = f"{os.fspath(path)}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus(namespace))
+        os.replace(tmp, path)
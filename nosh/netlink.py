@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import errno
+import os
+import socket
+import struct
+
+from .interface import InterfaceBackend, Link
+
+# from linux/netlink.h and linux/rtnetlink.h
+NETLINK_ROUTE = 0
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTMGRP_LINK = 0x1
+
+# from linux/if_link.h
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFLA_IFALIAS = 20
+
+OPERSTATES = [
+    "unknown",
+    "notpresent",
+    "down",
+    "lowerlayerdown",
+    "testing",
+    "dormant",
+    "up",
+]
+
+_nlmsghdr = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_ifinfomsg = struct.Struct("=BxHiII")  # family, type, index, flags, change
+_rtattr = struct.Struct("=HH")  # len, type
+
+
+def _align(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _parse_link(data: bytes | memoryview, offset: int, end: int) -> Link:
+    """Parses ifinfomsg and rtattrs of RTM_NEWLINK into Link."""
+    _, _, index, _, _ = _ifinfomsg.unpack_from(data, offset)
+    name = alias = operstate = ""
+    pos = offset + _ifinfomsg.size
+    while pos + _rtattr.size <= end:
+        alen, atype = _rtattr.unpack_from(data, pos)
+        if alen < _rtattr.size:
+            break
+        payload = bytes(data[pos + _rtattr.size : pos + alen])
+        if atype == IFLA_IFNAME:
+            name = payload.rstrip(b"\0").decode()
+        elif atype == IFLA_IFALIAS:
+            alias = payload.rstrip(b"\0").decode()
+        elif atype == IFLA_OPERSTATE and payload:
+            state = payload[0]
+            operstate = OPERSTATES[state] if state < len(OPERSTATES) else "unknown"
+        pos += _align(alen)
+    return Link(name, index=index, alias=alias, operstate=operstate)
+
+
+def parse_messages(data: bytes | memoryview) -> list[tuple[int, Link | None]]:
+    """Parses netlink messages in `data`, and returns a list of
+    (message type, Link). Link is None for messages other than
+    RTM_NEWLINK and RTM_DELLINK.
+
+    """
+    messages: list[tuple[int, Link | None]] = []
+    pos = 0
+    while pos + _nlmsghdr.size <= len(data):
+        mlen, mtype, _, _, _ = _nlmsghdr.unpack_from(data, pos)
+        if mlen < _nlmsghdr.size:
+            break
+        if mtype == NLMSG_ERROR:
+            (err,) = struct.unpack_from("=i", data, pos + _nlmsghdr.size)
+            if err < 0:
+                raise OSError(-err, os.strerror(-err))
+        link = None
+        if mtype in (RTM_NEWLINK, RTM_DELLINK):
+            link = _parse_link(data, pos + _nlmsghdr.size, pos + mlen)
+        messages.append((mtype, link))
+        pos += _align(mlen)
+    return messages
+
+
+def dump_links() -> list[Link]:
+    """Returns links of this host retrieved by a RTM_GETLINK dump."""
+    links: list[Link] = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.bind((0, 0))
+        seq = 1
+        ifi = _ifinfomsg.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        hdr = _nlmsghdr.pack(
+            _nlmsghdr.size + len(ifi), RTM_GETLINK, NLM_F_REQUEST | NLM_F_DUMP, seq, 0
+        )
+        sock.send(hdr + ifi)
+        while True:
+            data = sock.recv(65536)
+            for mtype, link in parse_messages(data):
+                if mtype == NLMSG_DONE:
+                    return links
+                if mtype == RTM_NEWLINK and link:
+                    links.append(link)
+
+
+class NetlinkBackend(InterfaceBackend):
+    """InterfaceBackend retrieving links over rtnetlink.
+
+    The first ``changed()`` subscribes to RTMGRP_LINK, and after that
+    ``changed()`` returns True only when link notifications arrived.
+
+    If netlink fails, e.g., by an error reply to the dump, links are
+    retrieved by `fallback` from then on, and reloaded after the ttl
+    of InterfaceCache as `notifies` turns False. Without `fallback`,
+    the OSError is raised.
+
+    :param fallback: InterfaceBackend used after netlink errors.
+    """
+
+    notifies = True
+
+    def __init__(self, fallback: InterfaceBackend | None = None):
+        self._sock: socket.socket | None = None
+        self.fallback = fallback
+
+    def links(self) -> list[Link]:
+        if self.fallback and not self.notifies:
+            return self.fallback.links()
+        try:
+            return dump_links()
+        except OSError:
+            self._fall_back()
+            assert self.fallback
+            return self.fallback.links()
+
+    def _fall_back(self):
+        """Switches to `fallback` on an OSError being handled, which is
+        raised again if there is no fallback."""
+        if not self.fallback:
+            raise
+        self.close()
+        self.notifies = False
+
+    def subscribe(self):
+        """Opens a netlink socket receiving link notifications."""
+        if self._sock:
+            return
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_LINK))
+        sock.setblocking(False)
+        self._sock = sock
+
+    def close(self):
+        """Closes the notification socket."""
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def __del__(self):
+        self.close()
+
+    def fileno(self) -> int:
+        """Returns fd of the notification socket to be watched by
+        event loops."""
+        self.subscribe()
+        assert self._sock
+        return self._sock.fileno()
+
+    def changed(self) -> bool:
+        if not self.notifies:
+            return False
+        if not self._sock:
+            try:
+                self.subscribe()
+            except OSError:
+                self._fall_back()
+            return True
+
+        changed = False
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except BlockingIOError:
+                return changed
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # notifications overflowed. must reload.
+                    changed = True
+                    continue
+                self._fall_back()
+                return True
+            if not data:
+                return changed
+            changed = True
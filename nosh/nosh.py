@@ -1,15 +1,41 @@
 from __future__ import annotations
 
-from typing import Callable, TextIO, Type, Any
-
+from typing import (
+    Callable,
+    TextIO,
+    Type,
+    Any,
+    Iterable,
+    Iterator,
+    AsyncIterator,
+    IO,
+    TYPE_CHECKING,
+)
+
+import os
 import re
 import sys
-import readline
+import time
+import functools
+import contextlib
+from operator import itemgetter
+
+from . import aio
+from .session import Session, current_session, using
+from .token import Token, BasicToken, TextToken, IntToken, InterfaceToken
+from .interface import interface_cache
+
+if TYPE_CHECKING:
+    from .job import Job, JobManager
+    from .metrics import Metrics
+    from .matcher import Matcher
+    from .pager import Pager
 
-from .token import Token, TextToken
+# readline, asyncio, and nosh.job are imported on first use to keep
+# `import nosh` fast for non-interactive uses.
 
 
-def instantiate(tree: dict) -> Token:
+def instantiate(tree: dict, lazy: bool = False) -> Token:
     """instantiates Token tree from the dict. The structure of dict is
 
     {
@@ -18,11 +44,28 @@ def instantiate(tree: dict) -> Token:
         "mark": <Mark>,
         "desc": Description,
         "action": Action,
+        "name": Parameter name,
+        "lazy": True or False,
         "leaves": [ {...}, ... ]
     }
+
+    An item of "leaves" may be a function that returns a Token or a
+    list of Tokens instead of a dict. If `lazy` is True, or "lazy" of
+    a dict is True, leaves of the Token are deferred until they are
+    accessed first (see ``BasicToken.defer()``).
     """
 
-    keys = ["text", "mark", "desc", "action", "regex", "range", "choices", "descmap"]
+    keys = [
+        "text",
+        "mark",
+        "desc",
+        "action",
+        "name",
+        "regex",
+        "range",
+        "choices",
+        "descmap",
+    ]
 
     def _instantiate(obj: dict) -> Token:
         kwargs = {}
@@ -32,24 +75,148 @@ def instantiate(tree: dict) -> Token:
         token: Token = obj["class"](**kwargs)
         return token
 
-    root = _instantiate(tree)
-
-    def _instatiate_recusive(subtree: dict, parent: Token):
+    def _instatiate_recusive(subtree: dict) -> Token:
         token = _instantiate(subtree)
-        parent.append(token)
-        if "leaves" in subtree:
-            for leaf_obj in subtree["leaves"]:
-                _instatiate_recusive(leaf_obj, token)
+        leaves = subtree.get("leaves", [])
+        if lazy or subtree.get("lazy", False):
+            if leaves:
+                token.defer(*leaves)
+            return token
+        for leaf_obj in leaves:
+            if isinstance(leaf_obj, dict):
+                token.append(_instatiate_recusive(leaf_obj))
+            else:
+                ret = leaf_obj()
+                token.append(*(ret if isinstance(ret, list) else [ret]))
+        return token
+
+    return _instatiate_recusive(tree)
+
+
+_mark_re = re.compile(r"<.*>")
+
+
+def _is_lines(ret: Any) -> bool:
+    """Returns True if `ret` of an action is an iterator of lines to
+    be streamed, e.g., a generator."""
+    return hasattr(ret, "__next__") and not isinstance(ret, (str, bytes))
+
+
+def _is_alines(ret: Any) -> bool:
+    """Returns True if `ret` of an action is an async iterator of lines
+    to be streamed, e.g., an async generator."""
+    return hasattr(ret, "__anext__")
+
+
+class ParseResult(list):
+    """ParseResult is the list of words of a line passed to an action
+    as `args`. `values` holds the value of each word converted by the
+    Token matching the word when the line was parsed, e.g., int for
+    IntToken and IPv4Address for IPv4AddressToken, so that actions do
+    not need to parse the words again. Values of TextTokens are the
+    texts.
+
+    `tokens` are the Tokens matching the words, and `params` maps
+    `name` of the Tokens having a name to their values. If `params`
+    is not empty, the action is called with `params` as keyword
+    arguments, e.g., ``act_ping(priv, args, target=..., count=5)``.
+
+    """
+
+    def __init__(
+        self,
+        words: Iterable[str] = (),
+        values: Iterable[Any] = (),
+        tokens: Iterable[Token] = (),
+    ):
+        super().__init__(words)
+        self.values: list[Any] = list(values)
+        self.tokens: list[Token] = list(tokens)
+        self.params: dict[str, Any] = {}
+        for token, value in zip(self.tokens, self.values):
+            name = getattr(token, "name", "")
+            if name:
+                self.params[name] = value
+
+
+def _bind(action: Callable, args: list[str]) -> Callable:
+    """Returns `action` taking the named parameters of `args` as
+    keyword arguments."""
+    if isinstance(args, ParseResult) and args.params:
+        return functools.partial(action, **args.params)
+    return action
 
-    if "leaves" in tree:
-        for subtree in tree["leaves"]:
-            _instatiate_recusive(subtree, root)
 
-    return root
+# exit status of CLI.run_argv()
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_SYNTAX = 2
 
 
 class SyntaxError(Exception):
-    pass
+    """SyntaxError is raised when a line does not match the token
+    tree. `candidates` are the texts that an ambiguous abbreviation
+    may mean, and `suggestions` are keywords similar to the word that
+    did not match.
+
+    """
+
+    def __init__(
+        self,
+        *args,
+        candidates: list[str] | None = None,
+        suggestions: list[str] | None = None,
+    ):
+        super().__init__(*args)
+        self.candidates = candidates or []
+        self.suggestions = suggestions or []
+
+    def report(self) -> str:
+        """Returns the message shown to users, followed by the
+        suggestions if any."""
+        msg = f"  {self}"
+        if self.suggestions:
+            msg += "\n  Did you mean: {}?".format(", ".join(self.suggestions))
+        return msg
+
+
+class ExecuteError(Exception):
+    """ExecuteError is raised by ``CLI.execute_stream()`` when a line
+    fails. `error` is the original exception, e.g., SyntaxError or an
+    exception raised by an action.
+
+    """
+
+    def __init__(self, lineno: int, line: str, error: Exception):
+        super().__init__(f"line {lineno}: {error}")
+        self.lineno = lineno
+        self.line = line
+        self.error = error
+
+
+class ExecuteReport:
+    """ExecuteReport is the result of ``CLI.execute_stream()``.
+
+    `lines` is the number of executed lines, `errors` is the list of
+    ExecuteError for failed lines, and `elapsed` is seconds spent.
+    """
+
+    def __init__(self):
+        self.lines = 0
+        self.errors: list[ExecuteError] = []
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Executed lines per second."""
+        if self.elapsed == 0:
+            return 0.0
+        return self.lines / self.elapsed
+
+    def __str__(self):
+        return "{} lines, {} errors, {:.3f} sec, {:.1f} lines/sec".format(
+            self.lines, len(self.errors), self.elapsed, self.throughput
+        )
 
 
 class CLI:
@@ -59,10 +226,18 @@ class CLI:
     initialize completion by readline (`setup()`), and provides a
     wrapper to execute CLI (`cli()`).
 
+    Per-user state, `file`, `private`, `debug`, and the prefix, is
+    held by a Session. `file`, `private`, and `debug` arguments make
+    the default session of this CLI. Methods accepting `session` use
+    the given Session instead, so that multiple users share the token
+    tree of one CLI.
+
     :param prombpt_cb: Callback function that returns prompt..
     :param file: TextIO object to write command descriptions.
     :param private: Any object passed to action.
     :param debug: Enable debug output.
+    :param abbrev: Accept unique prefixes of TextTokens, e.g., ``sh
+        int`` for ``show interfaces``.
 
     """
 
@@ -72,17 +247,63 @@ class CLI:
         file: TextIO = sys.stdout,
         private: Any = None,
         debug=False,
+        abbrev=False,
     ):
 
         self.root = TextToken(text="__root__", desc="Root Token")
         self.prompt_cb = prompt_cb
-        self.file = file
-        self.private = private
-        self.debug = debug
+        self.abbrev = abbrev
+
+        # the default session, used if no session is specified.
+        self.session = Session(file=file, private=private, debug=debug)
+
+        # JobManager for background execution, see enable_jobs().
+        self.jobs: JobManager | None = None
+
+        # Metrics of latencies and errors, see enable_metrics().
+        self.metrics: Metrics | None = None
+
+        # page output of actions returning iterators of lines if the
+        # file is a terminal.
+        self.paging = True
+
+    def _session(self) -> Session:
+        return current_session(self) or self.session
+
+    def _using(self, session: Session | None):
+        return using(session or self._session(), self)
+
+    @property
+    def file(self) -> TextIO:
+        return self._session().file
 
-        # prefix acehives `edit`. if len(self.prefix) > 0, self.prefix
-        # is inserted into the path with the index.
-        self.prefix: list[str] = []
+    @file.setter
+    def file(self, file: TextIO):
+        self._session().file = file
+
+    @property
+    def private(self) -> Any:
+        return self._session().private
+
+    @private.setter
+    def private(self, private: Any):
+        self._session().private = private
+
+    @property
+    def debug(self) -> bool:
+        return self._session().debug
+
+    @debug.setter
+    def debug(self, debug: bool):
+        self._session().debug = debug
+
+    @property
+    def prefix(self) -> list[str]:
+        return self._session().prefix
+
+    @prefix.setter
+    def prefix(self, prefix: list[str]):
+        self._session().prefix = prefix
 
     def _pr(self, msg, **kwargs):
         print(msg, file=self.file, **kwargs)
@@ -94,9 +315,14 @@ class CLI:
             return self.prompt_cb()
         return ">"
 
-    def longest_match(self, path: list[str]) -> tuple[Token, list[Token]]:
+    def longest_match(
+        self, path: list[str], values: list[Any] | None = None
+    ) -> tuple[Token, list[Token]]:
         """Retruns the Token most matching the path, and visted
-        Toekn(s) as a list.
+        Toekn(s) as a list. If abbreviations are enabled, abbreviated
+        words in `path` are replaced with the full texts. If `values`
+        is given, the values of the matched words converted by the
+        Tokens are appended to it.
 
         """
 
@@ -104,16 +330,99 @@ class CLI:
         token = self.root
         for i, text in enumerate(path):
             visited.append(token)
-            next_token = token.match_leaf(text)
+            next_token, value = token.match_leaf_value(text)
+            if not next_token and self.abbrev:
+                next_token = self._expand_word(token, path, i)
+                value = path[i]
             if not next_token:
                 break
             token = next_token
+            if values is not None:
+                values.append(value)
 
         if i + 1 != len(path):
-            raise SyntaxError(f"{' '.join(path[:i+1])} < syntax error")
+            raise self._syntax_error(
+                f"{' '.join(path[:i+1])} < syntax error", token, text
+            )
 
         return token, visited
 
+    def _parse(self, path: list[str]) -> tuple[Token, list[Token]]:
+        """Same as ``longest_match()``, but reuses the tokens reached
+        by the words before the last word of the previous call, if
+        they are unchanged. Typing a word, or repeating completion
+        for the same line, matches only the last word.
+
+        """
+        session = self._session()
+        head = tuple(path[:-1])
+        key = (self.root, BasicToken.generation, head)
+        cache = session._parse_cache
+        if cache and cache[0] == key and self._interfaces_unchanged(cache[2]):
+            token, visited = cache[1]
+            session.parse_hits += 1
+        else:
+            session.parse_misses += 1
+            visited = []
+            token = self.root
+            for i, text in enumerate(head):
+                visited.append(token)
+                next_token = token.match_leaf(text)
+                if not next_token and self.abbrev:
+                    next_token = self._expand_word(token, path, i)
+                if not next_token:
+                    raise self._syntax_error(
+                        f"{' '.join(path[:i+1])} < syntax error", token, text
+                    )
+                token = next_token
+            # words matching interface names expire with the names.
+            if any(isinstance(t, InterfaceToken) for t in visited[1:] + [token]):
+                generation = interface_cache.generation
+            else:
+                generation = None
+            session._parse_cache = (key, (token, visited), generation)
+
+        visited = visited + [token]
+        return token.match_leaf(path[-1]) or token, visited
+
+    @staticmethod
+    def _interfaces_unchanged(generation: int | None) -> bool:
+        """Returns True if `generation` is None or interface names are
+        unchanged since `generation` of ``interface_cache``."""
+        if generation is None:
+            return True
+        interface_cache.names()
+        return interface_cache.generation == generation
+
+    def _syntax_error(self, msg: str, token: Token, word: str) -> SyntaxError:
+        """Returns SyntaxError with suggestions for `word` that did not
+        match leaves of `token`."""
+        from .suggest import suggest
+
+        def local(text: str) -> bool:
+            return isinstance(token.find_leaf(text), TextToken)
+
+        return SyntaxError(msg, suggestions=suggest(word, local))
+
+    def _expand_word(self, token: Token, path: list[str], i: int) -> Token | None:
+        """Returns the leaf of `token` whose text `path[i]` abbreviates,
+        and replaces `path[i]` with the text. SyntaxError is raised if
+        the abbreviation is ambiguous.
+
+        """
+        if not path[i]:
+            return None
+        texts = token.expand(path[i])
+        if len(texts) > 1:
+            raise SyntaxError(
+                f"{' '.join(path[:i+1])} < ambiguous, candidates: {' '.join(texts)}",
+                candidates=texts,
+            )
+        if not texts:
+            return None
+        path[i] = texts[0]
+        return token.match_leaf(texts[0])
+
     def find(self, path: list[str | Type[Token]]) -> Token:
         """Retruns the Token exactry matching `path`. `path` can
         consists of String and `Token` classes, e.g., InterfaceToken.
@@ -133,6 +442,102 @@ class CLI:
         last = self.root.find(path)
         last.append(*tokens)
 
+    def enable_jobs(self, max_workers: int = 4):
+        """Enables background execution. A line ending with ``&`` is
+        executed in a thread pool of `max_workers` threads, and
+        ``jobs``, ``fg`` and ``kill`` commands are appended to this
+        CLI. Output that actions write to ``sys.stdout`` is captured
+        per job and printed by ``fg``.
+
+        """
+        if self.jobs:
+            return
+        from .job import JobManager
+
+        self.jobs = JobManager(max_workers=max_workers)
+
+        jobs = TextToken(text="jobs", desc="List background jobs", action=self._act_jobs)
+        fg = TextToken(text="fg", desc="Wait for a job and show its output", action=self._act_fg)
+        kill = TextToken(text="kill", desc="Kill a job")
+        fg.append(IntToken(mark="<job-id>", desc="Job ID", action=self._act_fg))
+        kill.append(IntToken(mark="<job-id>", desc="Job ID", action=self._act_kill))
+        self.append(jobs, fg, kill)
+
+    def enable_metrics(self, complete_budget: float = 0.05, slowest: int = 10) -> Metrics:
+        """Enables metrics of latencies of parse, action, and
+        completion per token path, and counts of errors. Completions
+        slower than `complete_budget` seconds are counted, and the
+        `slowest` commands are kept. Returns the Metrics, which is
+        also ``self.metrics``.
+
+        """
+        if not self.metrics:
+            from .metrics import Metrics
+
+            self.metrics = Metrics(complete_budget=complete_budget, slowest=slowest)
+        return self.metrics
+
+    def enable_introspection(self):
+        """Appends ``show cli statistics``, ``show cli caches`` and
+        ``show cli slowest`` commands reporting the token tree, hit
+        rates of caches, and the slowest commands recorded by metrics
+        (see ``enable_metrics()``). They are appended to the existing
+        ``show`` command if any.
+
+        """
+        from .introspect import Introspection
+
+        show = self.root.find_leaf("show")
+        if not show:
+            show = TextToken(text="show", desc="Show information")
+            self.append(show)
+        if not show.find_leaf("cli"):
+            show.append(Introspection(self).tokens())
+
+    def _measure(self, phase: str, path: str, line: str = ""):
+        if self.metrics:
+            return self.metrics.measure(phase, path, line)
+        return contextlib.nullcontext()
+
+    def _job(self, args: list[str]) -> Job | None:
+        assert self.jobs
+        job = self.jobs.get(int(args[-1]) if args[-1].isdigit() else None)
+        if not job:
+            self._pr("  no such job")
+        return job
+
+    def _act_jobs(self, priv: Any, args: list[str]):
+        assert self.jobs
+        # jobs listed as finished by the previous ``jobs`` are removed
+        # here, so that ``fg`` can show the output of a finished job
+        # after it is listed.
+        self.jobs.reap(notified=True)
+        for job in self.jobs.jobs.values():
+            self._pr(str(job))
+            if job.future and job.future.done():
+                job.notified = True
+
+    def _act_fg(self, priv: Any, args: list[str]):
+        assert self.jobs
+        job = self._job(args)
+        if not job:
+            return
+        self._pr(str(job))
+        err = self.jobs.wait(job)
+        self._pr(job.output.getvalue(), end="")
+        if err and not job.killed.is_set():
+            self._pr(f"  job {job.id} failed: {err.__class__.__name__}:{err}")
+
+    def _act_kill(self, priv: Any, args: list[str]):
+        assert self.jobs
+        job = self._job(args)
+        if not job:
+            return
+        if not self.jobs.kill(job):
+            self._pr(f"  job {job.id} has already finished")
+            return
+        self._pr(str(job))
+
     def set_prefix(self, prefix: list[str]):
         """Set `prefix` for linebuffer. If prefix is set, completion
         inserts the prefix into the next to the first token. For
@@ -164,31 +569,47 @@ class CLI:
 
     def complete_readline(self, text: str, state: int):
         """Wrapper to be called from readline."""
+        import readline
+
         return self.complete(readline.get_line_buffer(), text, state)
 
-    def complete(self, linebuffer: str, text: str, state: int) -> str | None:
-        """The actual completer for readline."""
-        if self.debug:
-            print()
-            print(f"linebuffer: '{linebuffer}'")
-            print(f"text:       '{text}'")
-            print(f"state:      '{state}'")
-            print(f"prefix:     '{self.prefix}'")
+    def candidates(
+        self, linebuffer: str, text: str, session: Session | None = None
+    ) -> list[tuple[str, str]]:
+        """Returns completion candidates, list of ("text", "desc"),
+        for `text`, the last word of `linebuffer`. SyntaxError is
+        raised if the words before `text` do not match.
+
+        """
+        with self._using(session):
+            return self._candidates(linebuffer, text)
+
+    def _candidates(self, linebuffer: str, text: str) -> list[tuple[str, str]]:
+        words = re.split(r"\s+", linebuffer)
+        if "|" in words[:-1]:
+            # complete filters of an output pipe
+            from . import pipe
+
+            i = len(words) - 1 - words[-2::-1].index("|")
+            return pipe.complete(words[i:], text, self._session().denied_filters)
 
-        path = self.insert_prefix(re.split(r"\s+", linebuffer))
+        path = self.insert_prefix(words)
         if self.debug:
             print(f"path:       '{path}'")
 
+        start = time.perf_counter()
         try:
-            token, visited = self.longest_match(path)
+            token, visited = self._parse(path)
+            candidates = token.complete(text, visited)
         except SyntaxError as e:
-            self._pr("\n")
-            self._pr(f"  {e}")
-            newbuffer = "\n{} {}".format(self.prompt, linebuffer)
-            self._pr(newbuffer, end="", flush=True)
-            return
+            if self.metrics:
+                self.metrics.error("complete", "", e)
+            raise
+        if self.metrics:
+            from .metrics import token_path
 
-        candidates = token.complete(text, visited)
+            elapsed = time.perf_counter() - start
+            self.metrics.observe("complete", token_path(visited[1:]), elapsed)
 
         if self.debug:
             visited_str = ", ".join(map(str, visited))
@@ -196,10 +617,47 @@ class CLI:
             print(f"token:      '{token}'")
             print(f"candidates: '{candidates}'")
 
+        return candidates
+
+    def complete(
+        self, linebuffer: str, text: str, state: int, session: Session | None = None
+    ) -> str | None:
+        """The actual completer for readline."""
+        with self._using(session):
+            return self._complete(linebuffer, text, state)
+
+    def _complete(self, linebuffer: str, text: str, state: int) -> str | None:
+        if self.debug:
+            print()
+            print(f"linebuffer: '{linebuffer}'")
+            print(f"text:       '{text}'")
+            print(f"state:      '{state}'")
+            print(f"prefix:     '{self.prefix}'")
+
+        session = self._session()
+        key = (self.root, BasicToken.generation, tuple(self.prefix), linebuffer, text)
+        if state > 0 and session._complete_cache and session._complete_cache[0] == key:
+            candidates, completions = session._complete_cache[1:]
+            session.complete_hits += 1
+        else:
+            session.complete_misses += 1
+            try:
+                candidates = self._candidates(linebuffer, text)
+            except SyntaxError as e:
+                self._pr("\n")
+                self._pr(e.report())
+                newbuffer = "\n{} {}".format(self.prompt, linebuffer)
+                self._pr(newbuffer, end="", flush=True)
+                return
+            completions = [
+                c[0] for c in candidates if not _mark_re.match(c[0])
+            ]  # omit mark of <TEXT>
+            session._complete_cache = (key, candidates, completions)
+
         if text == "":
             self._pr("\n")
             self._pr("Possible completions:")
-            for v, h in sorted(candidates, key=lambda x: x[0]):
+            for v, h in sorted(candidates, key=itemgetter(0)):
                 self._pr("  {:20} {}".format(v, h))
             newbuffer = "\n{} {}".format(self.prompt, linebuffer)
             self._pr(newbuffer, end="", flush=True)
@@ -212,42 +670,338 @@ class CLI:
             self._pr(newbuffer, end="", flush=True)
             return
 
-        compeletion_candidates = list(
-            filter(lambda x: not re.match(r"<.*>", x[0]), candidates)
-        )  # omit mark of <TEXT>
+        if state < len(completions):
+            return completions[state] + " "
 
-        if state < len(compeletion_candidates):
-            return compeletion_candidates[state][0] + " "
+    def execute(self, inputbuffer: str, session: Session | None = None):
+        with self._using(session):
+            for line in inputbuffer.split('\n'):
+                self._execute(line)
 
-    def execute(self, inputbuffer: str):
-        for line in inputbuffer.split('\n'):
-            self._execute(line)
+    def execute_stream(
+        self,
+        lines: Iterable[str | bytes],
+        stop_on_error: bool = True,
+        progress: Callable[[ExecuteReport], None] | None = None,
+        progress_interval: int = 10000,
+        session: Session | None = None,
+    ) -> ExecuteReport:
+        """Executes lines consumed from `lines` one by one. `lines` can
+        be any iterable of str or bytes, e.g., a file object.
+
+        If `stop_on_error` is True, ExecuteError with the line number
+        is raised at the first failed line. Otherwise, errors are
+        recorded in the returned ExecuteReport and execution
+        continues. `progress` is called with the report at every
+        `progress_interval` lines.
 
-    def _execute(self, linebuffer: str):
-        """Executes action of a Token matching the linebuffer"""
-        args = re.split(r"\s+", linebuffer)
+        """
+        report = ExecuteReport()
+        with self._using(session):
+            self._execute_stream(
+                lines, report, stop_on_error, progress, progress_interval
+            )
+        return report
+
+    def _execute_stream(
+        self,
+        lines: Iterable[str | bytes],
+        report: ExecuteReport,
+        stop_on_error: bool,
+        progress: Callable[[ExecuteReport], None] | None,
+        progress_interval: int,
+    ):
+        start = time.monotonic()
+        lineno = 0
+        try:
+            for lineno, line in enumerate(lines, start=1):
+                if isinstance(line, bytes):
+                    line = line.decode()
+                line = line.rstrip("\r\n")
+                try:
+                    self._execute(line)
+                except EOFError:
+                    raise
+                except Exception as e:
+                    err = ExecuteError(lineno, line, e)
+                    if stop_on_error:
+                        raise err from e
+                    report.errors.append(err)
+                report.lines = lineno
+                if progress and lineno % progress_interval == 0:
+                    report.elapsed = time.monotonic() - start
+                    progress(report)
+        finally:
+            report.lines = lineno
+            report.elapsed = time.monotonic() - start
+
+    def compile(self) -> Matcher:
+        """Returns a Matcher, which validates and classifies lines in
+        bulk with the token tree of this CLI compiled into a state
+        table, e.g., to check a large configuration file before
+        executing it.
+
+        """
+        from .matcher import Matcher
+
+        return Matcher(self)
+
+    def execute_file(
+        self,
+        file: str | os.PathLike | IO,
+        stop_on_error: bool = True,
+        use_mmap: bool = False,
+        **kwargs,
+    ) -> ExecuteReport:
+        """Executes lines in `file`, a path or a file object, by
+        ``execute_stream()``. If `use_mmap` is True, the file is
+        memory-mapped and read line by line.
+
+        """
+        if not isinstance(file, (str, os.PathLike)):
+            return self.execute_stream(file, stop_on_error=stop_on_error, **kwargs)
+
+        if not use_mmap:
+            with open(file, "r") as f:
+                return self.execute_stream(f, stop_on_error=stop_on_error, **kwargs)
+
+        import mmap
+
+        with open(file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.execute_stream([], stop_on_error=stop_on_error, **kwargs)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return self.execute_stream(
+                    iter(m.readline, b""), stop_on_error=stop_on_error, **kwargs
+                )
+
+    async def aexecute(self, inputbuffer: str, session: Session | None = None):
+        """Same as ``execute()``, but awaits actions returning
+        awaitables, e.g., coroutine functions, on the running event
+        loop."""
+        with self._using(session):
+            for line in inputbuffer.split("\n"):
+                await self._aexecute(line)
+
+    def _parse_line(
+        self, linebuffer: str, argv: list[str] | None = None
+    ) -> tuple[Token, list[str], str] | None:
+        """Same as ``_match_line()``, but records the parse latency if
+        metrics are enabled. Returns the token path label of the line
+        as well, which is empty if metrics are disabled."""
+        metrics = self.metrics
+        start = time.perf_counter()
+        try:
+            matched = self._match_line(linebuffer, argv)
+        except SyntaxError as e:
+            if metrics:
+                metrics.error("parse", "", e)
+            raise
+        if not matched:
+            return None
+        token, args, tokens = matched
+        if not metrics:
+            return token, args, ""
+
+        from .metrics import token_path
+
+        path = token_path(tokens)
+        metrics.observe("parse", path, time.perf_counter() - start)
+        return token, args, path
+
+    def _match_line(
+        self, linebuffer: str, argv: list[str] | None = None
+    ) -> tuple[Token, list[str], list[Token]] | None:
+        """Returns the Token to be executed for the linebuffer, its
+        arguments, and the matched tokens, or None if the linebuffer
+        is empty. If `argv` is given, its words are matched as they
+        are instead of the words split from linebuffer.
+
+        """
+        args = argv if argv is not None else re.split(r"\s+", linebuffer)
+        if not args:
+            return None
 
         first = self.root.match_leaf(args[0])
+        if not first and self.abbrev:
+            first = self._expand_word(self.root, list(args), 0)
         if not first:
             if linebuffer.strip() == "":
-                return
+                return None
             # first token is invalid
-            raise SyntaxError(f"{linebuffer} < invalid syntax")
+            raise self._syntax_error(
+                f"{linebuffer} < invalid syntax", self.root, args[0]
+            )
 
-        args = self.insert_prefix(re.split(r"\s+", linebuffer.strip()), force=True)
-        token, _ = self.longest_match(args)
+        if argv is None:
+            args = re.split(r"\s+", linebuffer.strip())
+        args = self.insert_prefix(list(args), force=True)
+        values: list[Any] = []
+        token, visited = self.longest_match(args, values)
 
         if token == self.root and linebuffer.strip() == "":
             # empty linebuffer.
-            return
+            return None
 
-        last = args[len(args) - 1]
-        if not token.action or not token.match(last):
-            # Token to be executed must have action, and
+        if len(values) != len(args):
             # the last argument must match the last token.
+            raise self._syntax_error(
+                f"{linebuffer} < invalid syntax", token, args[-1]
+            )
+        if not token.action:
+            # Token to be executed must have action.
             raise SyntaxError(f"{linebuffer} < invalid syntax")
 
-        token.action(self.private, args)
+        tokens = visited[1:] + [token]
+        return token, ParseResult(args, values, tokens), tokens
+
+    def _split_background(self, linebuffer: str) -> tuple[str, bool]:
+        """Strips a trailing ``&``, and returns the linebuffer and
+        whether it is executed in background. ``&`` is not special
+        unless jobs are enabled."""
+        if self.jobs and linebuffer.rstrip().endswith("&"):
+            return linebuffer.rstrip()[:-1], True
+        return linebuffer, False
+
+    def _submit(
+        self, linebuffer: str, token: Token, args: list[str], stages: list[list[str]]
+    ):
+        """Submits the action of `token` as a background job."""
+        if stages:
+            raise SyntaxError(f"{linebuffer} < pipe in background is not supported")
+        assert self.jobs and token.action
+        job = self.jobs.submit(
+            linebuffer.strip(), _bind(token.action, args), self.private, args
+        )
+        self._pr(f"[{job.id}] {job.line}", flush=True)
+
+    def _execute(self, linebuffer: str):
+        """Executes action of a Token matching the linebuffer"""
+        linebuffer, background = self._split_background(linebuffer)
+        linebuffer, stages = self._split_pipe(linebuffer)
+
+        matched = self._parse_line(linebuffer)
+        if not matched:
+            return
+        token, args, path = matched
+
+        if background:
+            self._submit(linebuffer, token, args, stages)
+            return
+
+        if stages:
+            from . import pipe
+
+            session = self._session()
+            with pipe.piped(session, pipe.filters(stages, session.denied_filters)):
+                self._run_action(token, args, path, linebuffer)
+        else:
+            self._run_action(token, args, path, linebuffer)
+        self._pr("", flush=True)
+
+    def _split_pipe(self, linebuffer: str) -> tuple[str, list[list[str]]]:
+        """Splits the linebuffer into the command and the words of
+        output pipe stages, e.g., ``show log | match error``."""
+        if "|" not in linebuffer:
+            return linebuffer, []
+        from . import pipe
+
+        return pipe.split(linebuffer)
+
+    def _run_action(self, token: Token, args: list[str], path: str, line: str):
+        assert token.action
+        with self._measure("action", path, line):
+            ret = _bind(token.action, args)(self.private, args)
+            if aio.isawaitable(ret):
+                # coroutine action called outside of acli()
+                ret = aio.resolve(ret)
+            if _is_lines(ret):
+                self._stream(ret)
+            elif _is_alines(ret):
+                aio.resolve(self._astream(ret))
+
+    def _pager(self) -> Pager | None:
+        from . import pager
+
+        file = self.file
+        return pager.Pager(file) if self.paging and pager.isatty(file) else None
+
+    def _stream(self, lines: Iterator[str]):
+        """Writes lines returned by an action to the file, through the
+        pager if the file is a terminal."""
+        from . import pager
+
+        pager.stream(lines, self.file, self._pager())
+
+    async def _astream(self, lines: Iterator[str] | AsyncIterator[str]):
+        """Like ``_stream()``, without blocking the event loop."""
+        from . import pager
+
+        await pager.astream(lines, self.file, self._pager())
+
+    def run_argv(self, argv: list[str], session: Session | None = None) -> int:
+        """Executes the command given as a list of words, e.g.,
+        ``sys.argv[1:]``, for non-interactive uses. The words are
+        matched as they are without joining and splitting, so that a
+        word may contain spaces, and readline is never used.
+
+        Returns an exit status: ``EXIT_OK`` if the action succeeded,
+        ``EXIT_ERROR`` if the action raised an exception, and
+        ``EXIT_SYNTAX`` if `argv` does not match a command. Errors are
+        written to ``sys.stderr``.
+
+        """
+        line = " ".join(argv)
+        with self._using(session):
+            try:
+                matched = self._parse_line(line, argv)
+            except SyntaxError as e:
+                print(e.report(), file=sys.stderr)
+                return EXIT_SYNTAX
+            if not matched:
+                print("  no command specified", file=sys.stderr)
+                return EXIT_SYNTAX
+
+            token, args, path = matched
+            try:
+                self._run_action(token, args, path, line)
+            except EOFError:
+                pass
+            except Exception as e:
+                print(f"{line}: {e.__class__.__name__}:{e}", file=sys.stderr)
+                return EXIT_ERROR
+            finally:
+                self.file.flush()
+        return EXIT_OK
+
+    async def _aexecute(self, linebuffer: str):
+        linebuffer, background = self._split_background(linebuffer)
+        linebuffer, stages = self._split_pipe(linebuffer)
+
+        matched = self._parse_line(linebuffer)
+        if not matched:
+            return
+        token, args, path = matched
+
+        if background:
+            # coroutine actions run on the loop of acli() through
+            # aio.resolve() in the job thread.
+            self._submit(linebuffer, token, args, stages)
+            return
+
+        with contextlib.ExitStack() as stack:
+            if stages:
+                from . import pipe
+
+                session = self._session()
+                filters = pipe.filters(stages, session.denied_filters)
+                stack.enter_context(pipe.piped(session, filters))
+            with self._measure("action", path, linebuffer):
+                ret = _bind(token.action, args)(self.private, args)
+                if aio.isawaitable(ret):
+                    ret = await ret
+                if _is_lines(ret) or _is_alines(ret):
+                    await self._astream(ret)
         self._pr("", flush=True)
 
     def start(self):
@@ -257,6 +1011,8 @@ class CLI:
         example.
 
         """
+        import readline
+
         readline.set_completer_delims(" ")
         readline.set_completer(self.complete_readline)
         readline.parse_and_bind("tab: complete")
@@ -265,6 +1021,8 @@ class CLI:
 
     def stop(self):
         """Stop completions"""
+        import readline
+
         readline.set_completer(None)
 
     def cli(self):
@@ -277,7 +1035,7 @@ class CLI:
                 self.execute(line)
 
             except SyntaxError as e:
-                self._pr(f"  {e}")
+                self._pr(e.report())
                 self._pr("")
 
             except KeyboardInterrupt:
@@ -296,3 +1054,47 @@ class CLI:
                 self.stop()
                 self.start()
                 continue
+
+    async def acli(self):
+        """Same as ``cli()``, but runs on the running event loop.
+        Actions and completion candidates may be awaitables, and the
+        event loop keeps running other tasks while the CLI waits for
+        input or awaits actions.
+
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        aio.attach(loop)
+        self.start()
+        try:
+            while True:
+                try:
+                    # input() with readline completion runs in an
+                    # executor thread not to block the event loop.
+                    prompt = "{} ".format(self.prompt)
+                    line = await loop.run_in_executor(None, input, prompt)
+                    self._pr("")
+                    await self.aexecute(line)
+
+                except SyntaxError as e:
+                    self._pr(e.report())
+                    self._pr("")
+
+                except KeyboardInterrupt:
+                    self._pr("")
+                    self._pr("")
+                    continue
+
+                except EOFError:
+                    self._pr("")
+                    break
+
+                except Exception as e:
+                    self._pr(f"CLI Catch Error: {e.__class__.__name__}:{e}")
+                    self._pr("")
+                    self.stop()
+                    self.start()
+                    continue
+        finally:
+            aio.detach()
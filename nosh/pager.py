@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from typing import AsyncIterator, Callable, Iterable, Iterator, TextIO
+
+import os
+import sys
+import shutil
+
+PROMPT = "--More--"
+
+
+def read_key() -> str:
+    """Reads a key from stdin without waiting for Enter if stdin is a
+    terminal. Returns "q" at EOF."""
+    if not sys.stdin.isatty():
+        return sys.stdin.readline()[:1] or "q"
+
+    import termios
+    import tty
+
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        return os.read(fd, 1).decode(errors="replace") or "q"
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+
+
+def isatty(file: TextIO) -> bool:
+    isatty = getattr(file, "isatty", None)
+    return bool(isatty and isatty())
+
+
+class Pager:
+    """Pager writes lines to `file` page by page. After each page, it
+    shows ``--More--`` and waits for a key: space shows the next page,
+    Enter shows the next line, and q quits.
+
+    :param file: TextIO object, usually a terminal.
+    :param height: Lines of a page. The terminal height if None.
+    :param getch: Function reading a key. ``read_key()`` if None.
+    """
+
+    def __init__(
+        self,
+        file: TextIO,
+        height: int | None = None,
+        getch: Callable[[], str] | None = None,
+    ):
+        self.file = file
+        self.height = height or shutil.get_terminal_size().lines
+        self.getch = getch or read_key
+        self.remaining = self.height - 1  # the last line is the prompt
+
+    def show(self, line: str) -> bool:
+        """Writes a line. Returns False if the user quit."""
+        if self.remaining <= 0:
+            self.file.write(PROMPT)
+            self.file.flush()
+            key = self.getch()
+            self.file.write("\r" + " " * len(PROMPT) + "\r")
+            if key in ("q", "Q", "\x03", "\x04"):
+                return False
+            self.remaining = 1 if key in ("\r", "\n") else self.height - 1
+        self.file.write(line)
+        self.remaining -= 1
+        return True
+
+
+def stream(
+    lines: Iterable[str],
+    file: TextIO,
+    pager: Pager | None = None,
+    stop: Callable[[], bool] | None = None,
+):
+    """Writes `lines`, an iterator of lines returned by an action, to
+    `file` one by one through `pager` if given. The iterator is closed
+    when the user quits the pager, `file` needs no more output, e.g.,
+    ``| head 10``, or `stop` returns True, so that generators stop
+    their work early.
+
+    """
+    it: Iterator[str] = iter(lines)
+    try:
+        for line in it:
+            if not line.endswith("\n"):
+                line += "\n"
+            if pager:
+                if not pager.show(line):
+                    break
+            else:
+                file.write(line)
+            if getattr(file, "done", False) or (stop and stop()):
+                break
+        file.flush()
+    finally:
+        close = getattr(it, "close", None)
+        if close:
+            close()
+
+
+async def astream(
+    lines: Iterable[str] | AsyncIterator[str],
+    file: TextIO,
+    pager: Pager | None = None,
+    stop: Callable[[], bool] | None = None,
+):
+    """Like ``stream()``, but `lines` may also be an async iterator,
+    e.g., an async generator, iterated with ``async for``. The pager
+    waits for a key in an executor, so that the event loop keeps
+    running other tasks, e.g., of ``CLIServer``, while the prompt is
+    shown."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    async def show(line: str) -> bool:
+        if not line.endswith("\n"):
+            line += "\n"
+        if pager:
+            if pager.remaining <= 0:
+                # show() blocks reading a key
+                return await loop.run_in_executor(None, pager.show, line)
+            return pager.show(line)
+        file.write(line)
+        return True
+
+    def done() -> bool:
+        return getattr(file, "done", False) or bool(stop and stop())
+
+    if hasattr(lines, "__anext__"):
+        ait: AsyncIterator[str] = lines  # type: ignore[assignment]
+        try:
+            async for line in ait:
+                if not await show(line) or done():
+                    break
+            file.flush()
+        finally:
+            aclose = getattr(ait, "aclose", None)
+            if aclose:
+                await aclose()
+        return
+
+    it: Iterator[str] = iter(lines)  # type: ignore[arg-type]
+    try:
+        for line in it:
+            if not await show(line) or done():
+                break
+        file.flush()
+    finally:
+        close = getattr(it, "close", None)
+        if close:
+            close()
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from typing import TextIO, Iterable, Iterator
+
+import re
+from collections import deque
+from contextlib import contextmanager
+
+from .nosh import SyntaxError
+from .session import Session
+from .capture import redirect_stdout
+
+
+class Filter:
+    """Filter is a stage of an output pipe, e.g., ``| match up``.
+
+    ``feed()`` receives a line of output without the newline, and
+    returns lines passed to the next stage. ``start()`` is called when
+    the pipe is entered, after all the stages are parsed, and
+    ``close()`` is called at the end of the output and returns the
+    remaining lines. Subclasses
+    define `name`, `mark` of their argument (empty if none), and
+    `desc` for completion.
+
+    :param args: Words following the filter name.
+    """
+
+    name = ""
+    mark = ""
+    desc = ""
+
+    # True if this filter drops all the following lines.
+    done = False
+
+    def __init__(self, args: list[str]):
+        if self.mark and not args:
+            raise SyntaxError(f"| {self.name} < {self.mark} required")
+        if not self.mark and args:
+            raise SyntaxError(f"| {self.name} {' '.join(args)} < invalid syntax")
+        self.args = args
+
+    def start(self):
+        pass
+
+    def feed(self, line: str) -> list[str]:
+        return [line]
+
+    def close(self) -> list[str]:
+        return []
+
+
+class Match(Filter):
+    name = "match"
+    mark = "<regex>"
+    desc = "Show only lines that match a pattern"
+
+    def __init__(self, args: list[str]):
+        super().__init__(args)
+        try:
+            self.regex = re.compile(" ".join(args))
+        except re.error as e:
+            raise SyntaxError(f"| {self.name} {' '.join(args)} < {e}")
+
+    def feed(self, line: str) -> list[str]:
+        return [line] if self.regex.search(line) else []
+
+
+class Except(Match):
+    name = "except"
+    desc = "Show only lines that do not match a pattern"
+
+    def feed(self, line: str) -> list[str]:
+        return [] if self.regex.search(line) else [line]
+
+
+class Count(Filter):
+    name = "count"
+    desc = "Count occurrences"
+
+    def __init__(self, args: list[str]):
+        super().__init__(args)
+        self.count = 0
+
+    def feed(self, line: str) -> list[str]:
+        self.count += 1
+        return []
+
+    def close(self) -> list[str]:
+        return [f"Count: {self.count} lines"]
+
+
+def _lines(name: str, args: list[str]) -> int:
+    if len(args) != 1 or not args[0].isdigit():
+        raise SyntaxError(f"| {name} {' '.join(args)} < <lines> must be a number")
+    return int(args[0])
+
+
+class Head(Filter):
+    name = "head"
+    mark = "<lines>"
+    desc = "Show the first lines"
+
+    def __init__(self, args: list[str]):
+        super().__init__(args)
+        self.remaining = _lines(self.name, args)
+        self.done = self.remaining == 0
+
+    def feed(self, line: str) -> list[str]:
+        if self.remaining <= 0:
+            return []
+        self.remaining -= 1
+        self.done = self.remaining == 0
+        return [line]
+
+
+class Last(Filter):
+    name = "last"
+    mark = "<lines>"
+    desc = "Show the last lines"
+
+    def __init__(self, args: list[str]):
+        super().__init__(args)
+        self.lines: deque[str] = deque(maxlen=_lines(self.name, args))
+
+    def feed(self, line: str) -> list[str]:
+        self.lines.append(line)
+        return []
+
+    def close(self) -> list[str]:
+        return list(self.lines)
+
+
+class Save(Filter):
+    name = "save"
+    mark = "<filename>"
+    desc = "Save output to a file"
+
+    def __init__(self, args: list[str]):
+        super().__init__(args)
+        self.filename = " ".join(args)
+        self.count = 0
+        self.file: TextIO | None = None
+
+    def start(self):
+        # opened only after all the stages are parsed, so that an
+        # invalid stage does not truncate the file.
+        try:
+            self.file = open(self.filename, "w")
+        except OSError as e:
+            raise SyntaxError(f"| {self.name} {self.filename} < {e.strerror}")
+
+    def feed(self, line: str) -> list[str]:
+        assert self.file
+        self.file.write(line + "\n")
+        self.count += 1
+        return []
+
+    def close(self) -> list[str]:
+        if not self.file:
+            return []
+        self.file.close()
+        self.file = None
+        return [f"Wrote {self.count} lines of output to '{self.filename}'"]
+
+
+FILTERS: dict[str, type[Filter]] = {
+    f.name: f for f in (Match, Except, Count, Head, Last, Save)
+}
+
+
+def split(linebuffer: str) -> tuple[str, list[list[str]]]:
+    """Splits linebuffer at ``|`` words. Returns the command line and
+    the words of each pipe stage."""
+    words = re.split(r"\s+", linebuffer.strip())
+    if "|" not in words:
+        return linebuffer, []
+    i = words.index("|")
+    stages: list[list[str]] = []
+    for word in words[i + 1 :]:
+        if word == "|":
+            stages.append([])
+        elif stages:
+            stages[-1].append(word)
+        else:
+            stages.append([word])
+    if len(stages) != words.count("|") or not all(stages):
+        raise SyntaxError(f"{linebuffer} < filter required after |")
+    return " ".join(words[:i]), stages
+
+
+def filters(stages: list[list[str]], denied: Iterable[str] = ()) -> list[Filter]:
+    """Returns Filters for the words of pipe stages. Filters named in
+    `denied` are refused."""
+    result = []
+    for words in stages:
+        cls = FILTERS.get(words[0])
+        if not cls:
+            raise SyntaxError(f"| {words[0]} < invalid filter")
+        if cls.name in denied:
+            raise SyntaxError(f"| {words[0]} < not allowed in this session")
+        result.append(cls(words[1:]))
+    return result
+
+
+def complete(
+    words: list[str], text: str, denied: Iterable[str] = ()
+) -> list[tuple[str, str]]:
+    """Returns completion candidates for `words`, the words of the
+    last pipe stage. Filters named in `denied` are not offered."""
+    if len(words) <= 1:
+        return [
+            (f.name, f.desc)
+            for f in FILTERS.values()
+            if f.name.startswith(text) and f.name not in denied
+        ]
+    cls = FILTERS.get(words[0])
+    if not cls or cls.name in denied or not cls.mark:
+        return []
+    return [(cls.mark, cls.desc)]
+
+
+class Pipe:
+    """File object that passes written output through Filters line by
+    line to `file`. Only the incomplete last line is buffered, so that
+    memory usage does not depend on the size of the output.
+
+    :param filters: Filters applied in order.
+    :param file: TextIO object receiving the filtered output.
+    """
+
+    def __init__(self, filters: list[Filter], file: TextIO):
+        self.filters = filters
+        self.file = file
+        self._buf = ""
+
+    def start(self):
+        """Starts the filters. Filters already started are closed if
+        one fails."""
+        started: list[Filter] = []
+        try:
+            for f in self.filters:
+                f.start()
+                started.append(f)
+        except BaseException:
+            for f in started:
+                f.close()
+            raise
+
+    @property
+    def done(self) -> bool:
+        """True if no more output can pass the filters."""
+        return any(f.done for f in self.filters)
+
+    def write(self, s: str) -> int:
+        buf = self._buf + s
+        start = 0
+        while True:
+            end = buf.find("\n", start)
+            if end < 0:
+                break
+            self._feed(buf[start:end], 0)
+            start = end + 1
+        self._buf = buf[start:]
+        return len(s)
+
+    def flush(self):
+        self.file.flush()
+
+    def _feed(self, line: str, stage: int):
+        if stage == len(self.filters):
+            self.file.write(line + "\n")
+            return
+        for out in self.filters[stage].feed(line):
+            self._feed(out, stage + 1)
+
+    def close(self):
+        """Passes the remaining output and closes the filters."""
+        if self._buf:
+            self._feed(self._buf, 0)
+            self._buf = ""
+        for stage, f in enumerate(self.filters):
+            for out in f.close():
+                self._feed(out, stage + 1)
+        self.file.flush()
+
+
+@contextmanager
+def piped(session: Session, filters: list[Filter]) -> Iterator[Pipe]:
+    """Redirects ``session.file`` and ``sys.stdout`` of this thread to
+    a Pipe through `filters` in this context."""
+    pipe = Pipe(filters, session.file)
+    pipe.start()
+    prev = session.file
+    session.file = pipe  # type: ignore[assignment]
+    try:
+        with redirect_stdout(pipe):  # type: ignore[arg-type]
+            yield pipe
+    finally:
+        session.file = prev
+        pipe.close()
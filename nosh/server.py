@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from typing import Any
+
+import io
+import re
+import time
+import asyncio
+from operator import itemgetter
+
+from .nosh import CLI, SyntaxError
+from .session import Session
+from .capture import redirect_stdout
+
+
+class SessionStats:
+    """Per-session statistics of CLIServer."""
+
+    def __init__(self, id: int, peer: Any):
+        self.id = id
+        self.peer = peer
+        self.started = time.time()
+        self.commands = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float, error: bool = False):
+        self.commands += 1
+        self.errors += int(error)
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.commands if self.commands else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "peer": self.peer,
+            "commands": self.commands,
+            "errors": self.errors,
+            "latency_mean": self.mean,
+            "latency_max": self.max,
+        }
+
+
+class CLIServer:
+    """CLIServer serves a CLI to many concurrent sessions over a Unix
+    or TCP socket, sharing the token tree of `cli`.
+
+    The protocol is line based like telnet. The server sends the
+    prompt, and the client sends a line:
+
+    - ``<line>?`` shows possible completions for the line.
+    - ``<line><TAB>`` completes the last word if it is unique,
+      otherwise shows possible completions.
+    - otherwise, the line is executed.
+
+    Output of the line follows, and then the prompt. Each connection
+    has its own Session, and completion and actions run in the default
+    executor so that a slow action does not block the other sessions.
+
+    Output pipes of sessions cannot use the filters in
+    `denied_filters`, ``save`` by default, which would let any client
+    write files as the user running the server.
+
+    :param cli: CLI whose token tree is served.
+    """
+
+    denied_filters = {"save"}
+
+    def __init__(self, cli: CLI):
+        self.cli = cli
+        self.sessions: dict[int, SessionStats] = {}
+        self._next_id = 1
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """Starts listening on the Unix socket `path`."""
+        return await asyncio.start_unix_server(self._handle, path=path)
+
+    async def start_tcp(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Starts listening on TCP `host`:`port`."""
+        return await asyncio.start_server(self._handle, host=host, port=port)
+
+    def stats(self) -> list[dict]:
+        """Returns statistics of connected sessions."""
+        return [s.as_dict() for s in self.sessions.values()]
+
+    def _describe(self, session: Session, line: str):
+        text = re.split(r"\s+", line)[-1]
+        candidates = self.cli.candidates(line, text, session=session)
+        print("Possible completions:", file=session.file)
+        for v, h in sorted(candidates, key=itemgetter(0)):
+            print("  {:20} {}".format(v, h), file=session.file)
+
+    def _complete(self, session: Session, line: str):
+        text = re.split(r"\s+", line)[-1]
+        candidates = self.cli.candidates(line, text, session=session) if text else []
+        completions = [v for v, _ in candidates if not re.match(r"<.*>", v)]
+        if len(completions) == 1:
+            print(line[: len(line) - len(text)] + completions[0] + " ", file=session.file)
+        else:
+            self._describe(session, line)
+
+    def _run(self, session: Session, line: str) -> bool:
+        """Runs the line in an executor thread. Returns False when
+        the session should be closed."""
+        with redirect_stdout(session.file):
+            try:
+                if line.endswith("?"):
+                    self._describe(session, line[:-1])
+                elif line.endswith("\t"):
+                    self._complete(session, line[:-1])
+                else:
+                    self.cli.execute(line, session=session)
+            except SyntaxError as e:
+                print(e.report(), file=session.file)
+                raise
+            except EOFError:
+                return False
+            except Exception as e:
+                print(f"CLI Catch Error: {e.__class__.__name__}:{e}", file=session.file)
+                raise
+        return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        stats = SessionStats(self._next_id, writer.get_extra_info("peername"))
+        self._next_id += 1
+        self.sessions[stats.id] = stats
+        session = Session(private=self.cli.private)
+        session.denied_filters = set(self.denied_filters)
+
+        try:
+            while True:
+                writer.write("{} ".format(self.cli.prompt).encode())
+                await writer.drain()
+
+                data = await reader.readline()
+                if not data:
+                    break
+                line = data.decode(errors="replace").rstrip("\r\n")
+
+                session.file = io.StringIO()
+                start = time.monotonic()
+                error = False
+                try:
+                    alive = await loop.run_in_executor(None, self._run, session, line)
+                except Exception:
+                    alive, error = True, True
+                stats.record(time.monotonic() - start, error)
+
+                writer.write(session.file.getvalue().encode())
+                if not alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[stats.id]
+            writer.close()
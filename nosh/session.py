@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import TextIO, Any, Iterator
+
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .token import Token
+
+
+class Session:
+    """Session holds per-user state of a CLI.
+
+    A CLI has its own default Session, and ``CLI.complete()``,
+    ``CLI.execute()`` and so on accept another Session, so that one
+    CLI and its token tree serve multiple users. While a Session is in
+    use, ``CLI.file``, ``CLI.private``, ``CLI.debug`` and the prefix
+    methods of the CLI refer to the Session.
+
+    :param file: TextIO object to write command descriptions.
+    :param private: Any object passed to action.
+    :param debug: Enable debug output.
+    """
+
+    def __init__(self, file: TextIO = sys.stdout, private: Any = None, debug=False):
+        self.file = file
+        self.private = private
+        self.debug = debug
+
+        # prefix acehives `edit`. if len(self.prefix) > 0, self.prefix
+        # is inserted into the path with the index.
+        self.prefix: list[str] = []
+
+        # names of output pipe filters refused in this session, e.g.,
+        # ``save`` in sessions of CLIServer.
+        self.denied_filters: set[str] = set()
+
+        # caches for CLI.complete(). _parse_cache holds the token and
+        # visited tokens reached by the words before the last word,
+        # with the generation of interface_cache if the words matched
+        # interface names, and _complete_cache holds the candidates
+        # and the completion words for a linebuffer, which readline
+        # requests repeatedly with incremented state. Keys include the
+        # root token of the CLI.
+        self._parse_cache: (
+            tuple[tuple, tuple[Token, list[Token]], int | None] | None
+        ) = None
+        self._complete_cache: tuple[tuple, list[tuple[str, str]], list[str]] | None = None
+
+        # hits and misses of the caches above.
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.complete_hits = 0
+        self.complete_misses = 0
+
+
+# (owner, Session) in use. the owner is the CLI that entered the
+# Session, so that a CLI used by an action of another CLI, e.g., to
+# switch modes, does not use the Session of the other CLI.
+_current: ContextVar[tuple[Any, Session] | None] = ContextVar(
+    "nosh_session", default=None
+)
+
+
+def current_session(owner: Any = None) -> Session | None:
+    """Returns the Session in use by the CLI, e.g., in actions. If
+    `owner` is given, returns the Session only if it was entered by
+    `owner`."""
+    entry = _current.get()
+    if entry is None or (owner is not None and entry[0] is not owner):
+        return None
+    return entry[1]
+
+
+@contextmanager
+def using(session: Session | None, owner: Any = None) -> Iterator[None]:
+    """Uses `session` in this context, entered by `owner`. Nothing
+    changes if `session` is None."""
+    if session is None:
+        yield
+        return
+    token = _current.set((owner, session))
+    try:
+        yield
+    finally:
+        _current.reset(token)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import os
+import stat
+import pickle
+import hashlib
+import inspect
+import warnings
+
+from ._version import __version__
+from .token import Token, BasicToken
+from . import suggest
+
+MAGIC = "nosh-snapshot"
+
+
+def fingerprint(sources: Iterable[str | os.PathLike] = ()) -> str:
+    """Returns a digest of the nosh version and the contents of
+    `sources`, files defining a token tree."""
+    h = hashlib.sha256(__version__.encode())
+    for source in sources:
+        h.update(os.fsencode(source))
+        with open(source, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def dump(
+    root: Token, path: str | os.PathLike, sources: Iterable[str | os.PathLike] = ()
+):
+    """Writes a snapshot of the token tree `root` to `path`.
+
+    The snapshot is a header, (MAGIC, fingerprint), followed by the
+    pickled tree, so token classes and actions are stored as
+    references to their modules and names. Actions must be
+    importable, e.g., lambdas cannot be stored.
+    """
+    header = pickle.dumps((MAGIC, fingerprint(sources)))
+    data = pickle.dumps(root, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    # not group or world writable regardless of umask, see _trusted().
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(header + data)
+    os.replace(tmp, path)
+
+
+def _trusted(f, path: str | os.PathLike) -> bool:
+    """Returns True if only the current user (or root) can write the
+    opened snapshot `f` and its directory. Unpickling runs code chosen
+    by whoever wrote the file, so that a snapshot writable by others
+    must not be loaded."""
+    if not hasattr(os, "geteuid"):
+        return True  # no POSIX ownership, e.g., Windows
+    owners = (os.geteuid(), 0)
+    unsafe = stat.S_IWGRP | stat.S_IWOTH
+    dirname = os.path.dirname(os.path.abspath(path))
+    for st in (os.fstat(f.fileno()), os.stat(dirname)):
+        if st.st_uid not in owners or st.st_mode & unsafe:
+            return False
+    return True
+
+
+def _register_keywords(root: Token):
+    """Adds texts of TextTokens in the loaded tree to the keywords for
+    suggestions, as unpickling does not call ``append()``. Deferred
+    leaves are registered when they are materialized."""
+    seen = set()
+    stack = [root]
+    while stack:
+        token = stack.pop()
+        if id(token) in seen:
+            continue
+        seen.add(id(token))
+        if isinstance(token, BasicToken) and token._textkeys:
+            for text in token._textkeys:
+                suggest.keywords.add(text)
+            suggest.keywords.watch(token, token._textkeys)
+        stack += getattr(token, "_leaves", [])
+
+
+def load(
+    path: str | os.PathLike, sources: Iterable[str | os.PathLike] = ()
+) -> Token | None:
+    """Returns the token tree stored in the snapshot `path`. None is
+    returned if the snapshot does not exist, is broken, or was made by
+    another nosh version or from other contents of `sources`.
+
+    Loading a snapshot unpickles it, which can run any code, so that
+    the snapshot is trusted as much as the user running the CLI. None
+    is returned with a warning if the file or its directory is owned
+    by another user (other than root) or is writable by group or
+    others. Keep snapshots in a directory only the user can write,
+    e.g., ``~/.cache``, not in ``/tmp``.
+
+    """
+    try:
+        with open(path, "rb") as f:
+            if not _trusted(f, path):
+                warnings.warn(f"ignored snapshot {path} writable by other users")
+                return None
+            if pickle.load(f) != (MAGIC, fingerprint(sources)):
+                return None
+            root = pickle.load(f)
+    except Exception:
+        return None
+    _register_keywords(root)
+    return root
+
+
+def cached(
+    path: str | os.PathLike,
+    build: Callable[[], Token],
+    sources: Iterable[str | os.PathLike] | None = None,
+) -> Token:
+    """Returns the token tree loaded from the snapshot `path`, or
+    built by `build` if the snapshot is invalid. A built tree is
+    stored to `path` for the next time. `sources` are files defining
+    the tree, and the source file of `build` by default.
+
+    For example::
+
+        cli.append(snapshot.cached(os.path.expanduser("~/.cache/show.snapshot"), build_show))
+
+    """
+    if sources is None:
+        sources = [inspect.getfile(build)]
+    sources = list(sources)
+
+    root = load(path, sources)
+    if root is not None:
+        return root
+
+    root = build()
+    try:
+        dump(root, path, sources)
+    except (pickle.PicklingError, AttributeError, TypeError, RecursionError, OSError) as e:
+        warnings.warn(f"failed to store snapshot {path}: {e}")
+    return root
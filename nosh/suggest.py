@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import threading
+import weakref
+
+
+def _peq(pattern: str) -> dict[str, int]:
+    peq: dict[str, int] = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq
+
+
+def _distance(peq: dict[str, int], m: int, text: str) -> int:
+    # bit-parallel Levenshtein distance by Myers and Hyyrö. bits of
+    # Pv and Mv are +1/-1 vertical deltas of a column of the DP table.
+    if m == 0:
+        return len(text)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def distance(a: str, b: str) -> int:
+    """Returns the Levenshtein distance between `a` and `b`."""
+    return _distance(_peq(a), len(a), b)
+
+
+def _keys(word: str) -> set[int]:
+    """Returns hashes of `word` and its one-character deletions."""
+    keys = {hash(word[:i] + word[i + 1 :]) for i in range(len(word))}
+    keys.add(hash(word))
+    return keys
+
+
+class KeywordIndex:
+    """Index of keywords, texts of TextTokens in all token trees, for
+    "did you mean" suggestions.
+
+    This is a symmetric deletion index: each keyword is stored under
+    itself and the strings made by deleting one character from it. A
+    query looks up itself and its one-character deletions, which finds
+    keywords within one insertion, deletion, or substitution, and
+    keywords made by deleting a character and inserting another,
+    e.g., adjacent transpositions (distance 2), with a few dict
+    lookups instead of walking a tree. Found keywords are verified by
+    ``distance()``. Other keywords at distance 2, e.g., those two
+    characters longer than the query, are not found, as indexing
+    two-character deletions would multiply the memory of the index.
+
+    Keywords are counted per token having them as leaves. ``add()`` is
+    called by ``BasicToken.append()`` and only queues new keywords, so
+    that building a large tree does not pay for the index. Keywords
+    of tokens that are garbage collected, e.g., of trees that are
+    rebuilt, are released by ``watch()``. Queued and released keywords
+    are (un)indexed at the next ``search()``.
+    """
+
+    def __init__(self):
+        self._words: set[str] = set()
+        # hash of a deletion -> keyword, or list of keywords if many.
+        # hashes save memory, and collisions are dropped by distance().
+        self._index: dict[int, str | list[str]] = {}
+        # keyword -> number of tokens having it as a leaf.
+        self._counts: dict[str, int] = {}
+        # keywords to index and to unindex. both are bounded by the
+        # number of distinct keywords.
+        self._queue: set[str] = set()
+        self._stale: set[str] = set()
+        # weakrefs of tokens -> keywords added for the tokens.
+        self._watched: dict[weakref.ref, list[str]] = {}
+        # reentrant, as release() may be called by the garbage
+        # collector while the lock is held.
+        self._lock = threading.RLock()
+
+    def add(self, keyword: str):
+        """Counts `keyword` for a token having it as a leaf."""
+        with self._lock:
+            n = self._counts.get(keyword, 0)
+            self._counts[keyword] = n + 1
+            if n == 0:
+                if keyword in self._stale:
+                    self._stale.discard(keyword)
+                else:
+                    self._queue.add(keyword)
+
+    def release(self, keywords: Iterable[str]):
+        """Uncounts `keywords` added for a token."""
+        with self._lock:
+            for keyword in keywords:
+                n = self._counts.get(keyword, 0) - 1
+                if n > 0:
+                    self._counts[keyword] = n
+                    continue
+                self._counts.pop(keyword, None)
+                if keyword in self._queue:
+                    self._queue.discard(keyword)
+                else:
+                    self._stale.add(keyword)
+
+    def watch(self, token: object, keywords: list[str]):
+        """Releases `keywords` when `token` is garbage collected.
+        `keywords` is the list of keywords added for `token` and may
+        grow afterwards."""
+        # a plain weakref is lighter than weakref.finalize().
+        self._watched[weakref.ref(token, self._collected)] = keywords
+
+    def _collected(self, ref: weakref.ref):
+        keywords = self._watched.pop(ref, None)
+        if keywords:
+            self.release(keywords)
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self._words)
+
+    def _flush(self):
+        if not self._queue and not self._stale:
+            return
+        with self._lock:
+            stale, self._stale = self._stale, set()
+            queue, self._queue = self._queue, set()
+            for keyword in stale:
+                self._words.discard(keyword)
+                for key in _keys(keyword):
+                    cur = self._index.get(key)
+                    if cur == keyword:
+                        del self._index[key]
+                    elif isinstance(cur, list) and keyword in cur:
+                        cur.remove(keyword)
+                        if len(cur) == 1:
+                            self._index[key] = cur[0]
+            for keyword in queue:
+                if keyword in self._words:
+                    continue
+                self._words.add(keyword)
+                for key in _keys(keyword):
+                    cur = self._index.get(key)
+                    if cur is None:
+                        self._index[key] = keyword
+                    elif isinstance(cur, str):
+                        self._index[key] = [cur, keyword]
+                    else:
+                        cur.append(keyword)
+
+    def search(self, word: str, max_distance: int = 2) -> list[tuple[int, str]]:
+        """Returns (distance, keyword) of keywords found for `word`
+        within `max_distance`, sorted by the distance and the keyword.
+        Keywords at distance 2 are found only by a deletion from each
+        side, and `max_distance` greater than 2 finds no more
+        keywords."""
+        self._flush()
+        found: set[str] = set()
+        for key in _keys(word):
+            cur = self._index.get(key)
+            if cur is None:
+                continue
+            if isinstance(cur, str):
+                found.add(cur)
+            else:
+                found.update(cur)
+        peq, m = _peq(word), len(word)
+        result = []
+        for keyword in found:
+            d = _distance(peq, m, keyword)
+            if d <= max_distance:
+                result.append((d, keyword))
+        result.sort()
+        return result
+
+
+keywords = KeywordIndex()
+
+
+def max_distance(word: str) -> int:
+    """Returns the edit distance allowed for suggestions of `word`:
+    1 for words up to 3 characters, and 2 for longer words, e.g.,
+    ``shwo`` for ``show``."""
+    return 1 if len(word) <= 3 else 2
+
+
+def suggest(
+    word: str, local: Callable[[str], bool] | None = None, limit: int = 5
+) -> list[str]:
+    """Returns keywords similar to `word`, the closest first. Keywords
+    for which `local` returns True, e.g., texts of leaves of the node
+    where `word` failed to match, precede the other keywords.
+
+    """
+    if not word:
+        return []
+    found = keywords.search(word, max_distance(word))
+    if local:
+        found.sort(key=lambda x: (not local(x[1]), x[0], x[1]))
+    return [w for _, w in found[:limit]]
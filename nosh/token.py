@@ -4,14 +4,117 @@ from typing import Callable, Any, Type
 
 import os
 import re
-import ipaddress
+import bisect
+import functools
+import threading
 
-import ifaddr
+from .aio import resolve
+from .interface import interface_cache
+from .suggest import keywords
+
+
+# serializes materialization of deferred leaves, see BasicToken.defer().
+_lazy_lock = threading.RLock()
+
+
+class _NoMatch:
+    def __repr__(self) -> str:
+        return "NOMATCH"
+
+    def __bool__(self) -> bool:
+        return False
+
+
+# returned by Token.match_value() if the text does not match. None or
+# False cannot be used because they may be values of texts.
+NOMATCH: Any = _NoMatch()
+
+
+# word classes returned by classify(). A word has the classes of the
+# characters it contains.
+DIGIT = 0x01
+ALPHA = 0x02
+DOT = 0x04
+COLON = 0x08
+SLASH = 0x10
+OTHER = 0x20
+ANY = DIGIT | ALPHA | DOT | COLON | SLASH | OTHER
+
+
+@functools.lru_cache(maxsize=4096)
+def classify(word: str) -> int:
+    """Returns the word classes of `word`, e.g., ``DIGIT | DOT`` for
+    ``10.0.0.1``."""
+    if word.isdigit():
+        return DIGIT
+    if word.isalpha():
+        return ALPHA
+    classes = 0
+    if "." in word:
+        classes |= DOT
+    if ":" in word:
+        classes |= COLON
+    if "/" in word:
+        classes |= SLASH
+    rest = word.replace(".", "").replace(":", "").replace("/", "")
+    if not rest:
+        return classes
+    if rest.isalnum():
+        if not rest.isalpha():
+            classes |= DIGIT
+        if not rest.isdigit():
+            classes |= ALPHA
+        return classes
+    classes |= OTHER
+    for c in rest:
+        if c.isdigit():
+            classes |= DIGIT
+        elif c.isalpha():
+            classes |= ALPHA
+    return classes
+
+
+def _traits(cls: type) -> tuple[int, int, bool]:
+    """Returns `word_classes` and `word_requires` of Token class
+    `cls`, and whether its match_value() can be used for matching. A
+    subclass overriding match() alone, e.g., a subclass of IntToken,
+    is matched by its match() for any word classes."""
+    traits = _traits_cache.get(cls)
+    if traits is None:
+        accepts, requires, converts = ANY, 0, False
+        for klass in cls.__mro__:
+            attrs = klass.__dict__
+            if "match" in attrs or "match_value" in attrs:
+                converts = "match_value" in attrs
+                if "word_classes" in attrs or "word_requires" in attrs:
+                    accepts = attrs.get("word_classes", ANY)
+                    requires = attrs.get("word_requires", 0)
+                break
+        traits = _traits_cache[cls] = (accepts, requires, converts)
+    return traits
+
+
+_traits_cache: dict[type, tuple[int, int, bool]] = {}
+
+
+def _match_value(token: Token, text: str) -> Any:
+    """Returns ``token.match_value(text)``, or `text` if
+    ``token.match(text)`` when match() is overridden alone."""
+    if _traits(type(token))[2]:
+        return token.match_value(text)
+    return text if token.match(text) else NOMATCH
 
 
 class Token(ABC):
     """Abstract class for Token classes."""
 
+    # word classes (see classify()) of texts that this Token may
+    # match, and word classes that the texts must have. match() is not
+    # tried for the other words. Token classes overriding match()
+    # declare these in the same class, otherwise they are ignored.
+    word_classes = ANY
+    word_requires = 0
+
     @property
     @abstractmethod
     def action(self) -> Callable[[Any, list[str]]] | None:
@@ -51,7 +154,8 @@ class Token(ABC):
     def completion_candidates(self, text: str) -> list[tuple[str, str]]:
         """Retrun candidates, list of ("text", "desc"), for this
         Token. This function is called from ``complete()`` of the
-        parent token."""
+        parent token. It may return an awaitable of the candidates,
+        which is resolved on the event loop of ``CLI.acli()``."""
         pass
 
     @abstractmethod
@@ -59,6 +163,13 @@ class Token(ABC):
         """Return true if `text` exactly match this Token."""
         pass
 
+    def match_value(self, text: str) -> Any:
+        """Return the value of `text` converted by this Token, e.g.,
+        int for IntToken, if `text` matches this Token, otherwise
+        NOMATCH. Token classes converting texts should override this,
+        so that a text is parsed only once."""
+        return text if self.match(text) else NOMATCH
+
     @abstractmethod
     def append(self, *args: Token):
         """Append Tokens as leaf Tokens to this Token."""
@@ -70,6 +181,12 @@ class Token(ABC):
         otherwise None."""
         pass
 
+    def match_leaf_value(self, text: str) -> tuple[Token | None, Any]:
+        """Same as ``match_leaf()``, but returns the value of `text`
+        converted by the Token as well (see ``match_value()``)."""
+        leaf = self.match_leaf(text)
+        return leaf, _match_value(leaf, text) if leaf else NOMATCH
+
     @abstractmethod
     def find_leaf(self, p: str | type[Token]) -> Token | None:
         """Return a Token, which matches `p` (`text` or `Token`
@@ -87,6 +204,11 @@ class Token(ABC):
         the `path`."""
         pass
 
+    def expand(self, text: str) -> list[str]:
+        """Return texts of leaf Tokens that `text` abbreviates. One
+        text is returned if `text` is a unique prefix."""
+        return []
+
 
 class BasicToken(Token):
     """Basic Token is a super class for a cli token. Concrete Token
@@ -97,21 +219,58 @@ class BasicToken(Token):
     :param mark: like `<MARK>` that indicates what this token is (if text is not set).
     :param desc: description string.
     :param action: callback function if this token is executed.
+    :param name: parameter name. The value of the word matching this
+        token is passed to the action as the keyword argument `name`.
     """
 
+    # incremented whenever leaves of any BasicToken are appended, so
+    # that caches of parse results can detect token tree changes.
+    generation = 0
+
     def __init__(
         self,
         text: str = "",
         mark: str = "",
         desc: str = "",
         action: Callable[[Any, list[str]]] | None = None,
+        name: str = "",
     ):
         self._text = text
         self.mark = mark
         self.desc = desc
+        self.name = name
         self._leaves: list[Token] = []
         self._action = action
 
+        # Indexes over leaves maintained by append(). _textmap holds
+        # static TextToken leaves for match_leaf(), _dynleaves holds
+        # the other leaves in priority order. _texts and _classes are
+        # used by find_leaf().
+        self._textmap: dict[str, Token] = {}
+        self._dynleaves: list[Token] = []
+        # _dynleaves with their _traits(), for match_leaf_value().
+        self._dynmatch: tuple[tuple[Token, int, int, bool], ...] = ()
+        self._texts: dict[str, Token] = {}
+        self._classes: dict[type, Token] = {}
+
+        # _textkeys is the sorted list of _textmap keys for prefix
+        # completion, and _rank records the appended order of leaves
+        # to keep candidates in the leaves order.
+        self._textkeys: list[str] = []
+        self._rank: dict[Token, int] = {}
+
+        # static leaves sharing a text, for the texts having more than
+        # one. complete() lists all of them.
+        self._duplicates: dict[str, list[Token]] = {}
+
+        # _prefixes maps prefixes of _textkeys to the text they
+        # abbreviate, or None if ambiguous. Built by the first
+        # expand(), and then maintained by append().
+        self._prefixes: dict[str, str | None] | None = None
+
+        # subtree specs and factories deferred by defer().
+        self._pending: list[dict | Callable[[], Token | list[Token]]] = []
+
         if self.mark and not re.match(r"<.*>", self.mark):
             raise ValueError("mark must be <TEXT> format")
 
@@ -134,6 +293,8 @@ class BasicToken(Token):
 
     @property
     def leaves(self) -> list[Token]:
+        if self._pending:
+            self._materialize()
         return self._leaves
 
     @classmethod
@@ -168,41 +329,225 @@ class BasicToken(Token):
             is already matched, so we need to dig the leaf tokens."""
             return [(text, self.desc)]
 
+        if self._pending:
+            self._materialize()
+
         candidates: list[tuple[str, str]] = []
         if text == "" and self.action:
             candidates.append(("<[Enter]>", "Execute this command"))
 
-        for leaf in self.leaves:
-            if leaf in visited:
+        skip = set(visited)
+
+        if text == "":
+            # all leaves are candidates, in the leaves order.
+            for leaf in self.leaves:
+                if leaf in skip:
+                    continue
+                if self._textmap.get(leaf.text) is leaf:
+                    candidates.append((leaf.text, leaf.desc))
+                else:
+                    candidates += resolve(leaf.completion_candidates(text))
+            return candidates
+
+        # static leaves prefixed by text are a range of _textkeys.
+        # Merge them with the other leaves in the leaves order.
+        leaves = []
+        for key in self._prefixed(text):
+            leaves += self._duplicates.get(key) or [self._textmap[key]]
+        leaves += self._dynleaves
+        leaves.sort(key=lambda token: (token.priority, self._rank[token]))
+
+        for leaf in leaves:
+            if leaf in skip:
                 continue
-            candidates += leaf.completion_candidates(text)
+            if self._textmap.get(leaf.text) is leaf:
+                candidates.append((leaf.text, leaf.desc))
+            else:
+                candidates += resolve(leaf.completion_candidates(text))
         return candidates
 
+    def _prefixed(self, text: str) -> list[str]:
+        """Returns _textkeys starting with text."""
+        keys = self._textkeys
+        start = end = bisect.bisect_left(keys, text)
+        while end < len(keys) and keys[end].startswith(text):
+            end += 1
+        return keys[start:end]
+
+    @staticmethod
+    def _add_prefixes(prefixes: dict[str, str | None], key: str):
+        for n in range(1, len(key) + 1):
+            prefix = key[:n]
+            cur = prefixes.get(prefix, "")
+            if cur == "":
+                prefixes[prefix] = key
+            elif cur != key:
+                prefixes[prefix] = None
+
+    def expand(self, text: str) -> list[str]:
+        """Returns texts of static TextToken leaves that `text`
+        abbreviates, e.g., ``["interfaces"]`` for ``int``. More than
+        one text is returned if `text` is ambiguous.
+
+        """
+        if self._pending:
+            self._materialize()
+        prefixes = self._prefixes
+        if prefixes is None:
+            with _lazy_lock:
+                # the index is published after it is built, as other
+                # threads, e.g., sessions of CLIServer, may read it.
+                prefixes = self._prefixes
+                if prefixes is None:
+                    prefixes = {}
+                    for key in self._textkeys:
+                        self._add_prefixes(prefixes, key)
+                    self._prefixes = prefixes
+        key = prefixes.get(text, "")
+        if key is None:
+            return self._prefixed(text)
+        return [key] if key else []
+
+    @staticmethod
+    def _is_static(token: Token) -> bool:
+        """Returns True if `token` matches and completes only its own
+        text, i.e., it is a TextToken that overrides neither match()
+        nor completion_candidates()."""
+        cls = type(token)
+        return (
+            isinstance(token, TextToken)
+            and cls.match is TextToken.match
+            and cls.completion_candidates is TextToken.completion_candidates
+        )
+
+    @staticmethod
+    def _index(index: dict, key: Any, token: Token):
+        # keep the first token in the leaves order, that is, the
+        # lowest priority, and the earliest appended on a tie.
+        cur = index.get(key)
+        if cur is None or token.priority < cur.priority:
+            index[key] = token
+
+    def defer(self, *specs: dict | Callable[[], Token | list[Token]]):
+        """Defers leaf tokens until they are needed. `specs` are dicts
+        for ``instantiate()`` or factory functions that return a Token
+        or a list of Tokens. They are instantiated and appended when
+        leaves of this token are accessed first, e.g., by
+        ``match_leaf()``, ``find_leaf()``, and ``complete()``.
+
+        Factories must not access this token itself.
+        """
+        with _lazy_lock:
+            self._pending.extend(specs)
+
+    def _materialize(self):
+        with _lazy_lock:
+            # another thread may have materialized this token while
+            # this thread waited for the lock.
+            if not self._pending:
+                return
+            from .nosh import instantiate
+
+            tokens: list[Token] = []
+            for spec in self._pending:
+                if isinstance(spec, dict):
+                    tokens.append(instantiate(spec, lazy=True))
+                else:
+                    ret = spec()
+                    tokens += ret if isinstance(ret, list) else [ret]
+            self._append(*tokens)
+            self._pending = []
+
     def append(self, *args: Token):
         """Appends leaf tokens"""
+        if self._pending:
+            self._materialize()
+        self._append(*args)
+
+    def _append(self, *args: Token):
+        BasicToken.generation += 1
+        # leaves are kept sorted by priority. sort only when a leaf
+        # breaks the order, as tokens are mostly appended in order.
+        unsorted = dynamic = False
         for arg in args:
-            self.leaves.append(arg)
-        self.leaves.sort(key=lambda token: token.priority)
+            if self._leaves and arg.priority < self._leaves[-1].priority:
+                unsorted = True
+            self._leaves.append(arg)
+            self._rank.setdefault(arg, len(self._rank))
+            self._index(self._texts, arg.text, arg)
+            self._index(self._classes, type(arg), arg)
+            if self._is_static(arg):
+                if arg.text in self._textmap:
+                    dups = self._duplicates.setdefault(
+                        arg.text, [self._textmap[arg.text]]
+                    )
+                    dups.append(arg)
+                else:
+                    if not self._textkeys:
+                        keywords.watch(self, self._textkeys)
+                    bisect.insort(self._textkeys, arg.text)
+                    keywords.add(arg.text)
+                    if self._prefixes is not None:
+                        self._add_prefixes(self._prefixes, arg.text)
+                self._index(self._textmap, arg.text, arg)
+            else:
+                if self._dynleaves and arg.priority < self._dynleaves[-1].priority:
+                    dynamic = True
+                self._dynleaves.append(arg)
+        if unsorted:
+            self._leaves.sort(key=lambda token: token.priority)
+        if dynamic:
+            self._dynleaves.sort(key=lambda token: token.priority)
+        if len(self._dynmatch) != len(self._dynleaves):
+            self._dynmatch = tuple(
+                (leaf, *_traits(type(leaf))) for leaf in self._dynleaves
+            )
 
     def match_leaf(self, text: str) -> Token | None:
         """returns leaf Token most matching text"""
-        for leaf in self.leaves:
-            if leaf.match(text):
-                return leaf
-        return None
+        return self._match_leaf_value(text)[0]
+
+    def match_leaf_value(self, text: str) -> tuple[Token | None, Any]:
+        """returns leaf Token most matching text and the value of text
+        converted by the Token."""
+        if type(self).match_leaf is not BasicToken.match_leaf:
+            # a subclass overriding match_leaf() is honoured by parsing
+            # as well as by completion.
+            leaf = self.match_leaf(text)
+            return leaf, _match_value(leaf, text) if leaf else NOMATCH
+        return self._match_leaf_value(text)
+
+    def _match_leaf_value(self, text: str) -> tuple[Token | None, Any]:
+        if self._pending:
+            self._materialize()
+        hit = self._textmap.get(text)
+        classes = -1
+        for leaf, accepts, requires, converts in self._dynmatch:
+            if hit and hit.priority <= leaf.priority:
+                break
+            if accepts != ANY or requires:
+                # skip leaves that cannot match, without parsing.
+                if classes < 0:
+                    classes = classify(text)
+                if classes & ~accepts or classes & requires != requires:
+                    continue
+            if converts:
+                value = leaf.match_value(text)
+            else:
+                value = text if leaf.match(text) else NOMATCH
+            if value is not NOMATCH:
+                return leaf, value
+        if hit:
+            return hit, text
+        return None, NOMATCH
 
     def find_leaf(self, p: str | type[Token]) -> Token | None:
         """retruns leaf Token having the same text or the same Class"""
+        if self._pending:
+            self._materialize()
         if isinstance(p, str):
-            for leaf in self.leaves:
-                if leaf.text == p:
-                    return leaf
-            return None
-
-        for leaf in self.leaves:
-            if type(leaf) == p:
-                return leaf
-        return None
+            return self._texts.get(p)
+        return self._classes.get(p)
 
     def find(self, path: list[str | Type[Token]]) -> Token:
         """Retruns the Token exactry matching `path` under this
@@ -266,8 +611,9 @@ class InterfaceToken(BasicToken):
 
     InterfaceToken must not have `text`. Instead, it has `mark`
     ``<interface-name>`` by default. Completion candidates are
-    interface names retrieved by ``ifaddr``. `regex` can filter
-    interface names.
+    interface names retrieved from ``interface_cache`` with their
+    states and aliases as descriptions. `regex` can filter interface
+    names.
     """
 
     def __init__(self, regex: str | None = None, **kwargs):
@@ -277,13 +623,31 @@ class InterfaceToken(BasicToken):
         self.regex = regex
         super().__init__(**kwargs)
 
+        # interface names filtered by regex, memoized for the
+        # generation of interface_cache.
+        self._generation = -1
+        self._names: list[str] = []
+        self._nameset: set[str] = set()
+
     def __str__(self):
         return "<Interface>"
 
+    def __getstate__(self):
+        # do not store memoized interface names in snapshots.
+        state = self.__dict__.copy()
+        state.update(_generation=-1, _names=[], _nameset=set())
+        return state
+
     def _ifnames(self) -> list[str]:
-        if os.path.exists("/sys/class/net"):
-            return sorted(os.listdir("/sys/class/net"))
-        return sorted([ a.name for a in ifaddr.get_adapters()])
+        names = interface_cache.names()
+        if self._generation != interface_cache.generation:
+            if self.regex:
+                r = re.compile(self.regex)
+                names = [n for n in names if r.match(n)]
+            self._names = names
+            self._nameset = set(names)
+            self._generation = interface_cache.generation
+        return self._names
 
     def completion_candidates(self, text: str) -> list[tuple[str, str]]:
 
@@ -291,21 +655,19 @@ class InterfaceToken(BasicToken):
         if self.mark:
             candidates.append((self.mark, self.desc))
 
-        for ifname in self._ifnames():
-            if self.regex and not re.match(self.regex, ifname):
-                continue
-            if ifname.startswith(text):
-                candidates.append((ifname, ""))
+        names = self._ifnames()
+        links = interface_cache.links()
+        for i in range(bisect.bisect_left(names, text), len(names)):
+            if not names[i].startswith(text):
+                break
+            link = links.get(names[i])
+            candidates.append((names[i], link.describe() if link else ""))
 
         return candidates
 
     def match(self, text: str) -> bool:
-        for ifname in self._ifnames():
-            if self.regex and not re.match(self.regex, ifname):
-                continue
-            if ifname == text:
-                return True
-        return False
+        self._ifnames()
+        return text in self._nameset
 
 
 class StringToken(BasicToken):
@@ -346,6 +708,9 @@ class IntToken(BasicToken):
 
     """
 
+    word_classes = DIGIT | OTHER  # sign and underscores
+    word_requires = DIGIT
+
     def __init__(self, range: tuple[int, int] | None = None, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<int>")
@@ -364,13 +729,16 @@ class IntToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
         try:
             v = int(text)
-            if self.range and (v < self.range[0] or self.range[1] < v):
-                return False
-            return True
         except ValueError:
-            return False
+            return NOMATCH
+        if self.range and (v < self.range[0] or self.range[1] < v):
+            return NOMATCH
+        return v
 
 
 class FloatToken(BasicToken):
@@ -383,6 +751,8 @@ class FloatToken(BasicToken):
 
     """
 
+    word_classes = DIGIT | ALPHA | DOT | OTHER  # 1e3, inf, and sign
+
     def __init__(self, range: tuple[float|int, float|int] | None = None, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<float>")
@@ -401,18 +771,24 @@ class FloatToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
         try:
             v = float(text)
-            if self.range and (v < self.range[0] or self.range[1] < v):
-                return False
-            return True
         except ValueError:
-            return False
+            return NOMATCH
+        if self.range and (v < self.range[0] or self.range[1] < v):
+            return NOMATCH
+        return v
 
 
 class IPv4AddressToken(BasicToken):
     """Token representing IPv4Address."""
 
+    word_classes = DIGIT | DOT
+    word_requires = DIGIT | DOT
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<ipv4-address>")
@@ -426,16 +802,23 @@ class IPv4AddressToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
+        import ipaddress
+
         try:
-            ipaddress.IPv4Address(text)
-            return True
+            return ipaddress.IPv4Address(text)
         except ipaddress.AddressValueError:
-            return False
+            return NOMATCH
 
 
 class IPv6AddressToken(BasicToken):
     """Token representing IPv6Address."""
 
+    word_classes = ANY & ~SLASH
+    word_requires = COLON
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<ipv6-address>")
@@ -449,16 +832,22 @@ class IPv6AddressToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
+        import ipaddress
+
         try:
-            ipaddress.IPv6Address(text)
-            return True
+            return ipaddress.IPv6Address(text)
         except ipaddress.AddressValueError:
-            return False
+            return NOMATCH
 
 
 class IPAddressToken(BasicToken):
     """Token representing IPv4 or IPv6 Address."""
 
+    word_classes = ANY & ~SLASH
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<address>")
@@ -472,11 +861,15 @@ class IPAddressToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
+        import ipaddress
+
         try:
-            ipaddress.ip_address(text)
-            return True
+            return ipaddress.ip_address(text)
         except ValueError:
-            return False
+            return NOMATCH
 
 
 class InterfaceAddressToken(BasicToken):
@@ -485,6 +878,8 @@ class InterfaceAddressToken(BasicToken):
     This token matches IPv4-ADDRESS/Preflen or IPv6-ADDRESS/preflen.
     """
 
+    word_requires = SLASH
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<address>")
@@ -498,19 +893,25 @@ class InterfaceAddressToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
 
+    def match_value(self, text: str) -> Any:
         if not "/" in text:
-            return False
+            return NOMATCH
+        import ipaddress
+
         try:
-            ipaddress.ip_interface(text)
-            return True
+            return ipaddress.ip_interface(text)
         except ValueError:
-            return False
+            return NOMATCH
 
 
 class IPv4NetworkToken(BasicToken):
     """Token representing IPv4Address."""
 
+    word_classes = DIGIT | DOT | SLASH
+    word_requires = DIGIT | SLASH
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<ipv4network/preflen>")
@@ -524,18 +925,24 @@ class IPv4NetworkToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
         if not "/" in text:
-            return False
+            return NOMATCH
+        import ipaddress
+
         try:
-            ipaddress.IPv4Network(text)
-            return True
+            return ipaddress.IPv4Network(text)
         except ValueError:
-            return False
+            return NOMATCH
 
 
 class IPv6NetworkToken(BasicToken):
     """Token representing IPv6Address."""
 
+    word_requires = COLON | SLASH
+
     def __init__(self, **kwargs):
         self.must_not_have("text", kwargs)
         kwargs.setdefault("mark", "<ipv6network/preflen>")
@@ -549,13 +956,17 @@ class IPv6NetworkToken(BasicToken):
         return [(self.mark, self.desc)]
 
     def match(self, text: str) -> bool:
+        return self.match_value(text) is not NOMATCH
+
+    def match_value(self, text: str) -> Any:
         if not "/" in text:
-            return False
+            return NOMATCH
+        import ipaddress
+
         try:
-            ipaddress.IPv6Network(text)
-            return True
+            return ipaddress.IPv6Network(text)
         except ValueError:
-            return False
+            return NOMATCH
 
 
 class ChoiceToken(BasicToken):
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+# seconds allowed for `import nosh` in a fresh interpreter. about 0.025
+# is measured; NOSH_IMPORT_BUDGET overrides it for slow machines.
+IMPORT_BUDGET = float(os.environ.get("NOSH_IMPORT_BUDGET", "0.06"))
+
+# modules that must be imported on first use, not by `import nosh`
+LAZY_MODULES = [
+    "readline",
+    "ipaddress",
+    "ifaddr",
+    "asyncio",
+    "socket",
+    "concurrent.futures",
+]
+
+code = """
+import sys, time, json
+start = time.perf_counter()
+import nosh
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def import_nosh() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.check_output([sys.executable, "-c", code], cwd=root, text=True)
+    return json.loads(out)
+
+
+def test_import_is_lazy():
+    modules = import_nosh()["modules"]
+    for name in LAZY_MODULES:
+        assert not name in modules, f"{name} is imported by `import nosh`"
+
+
+def test_import_budget():
+    # the best of several runs to avoid noise
+    elapsed = min(import_nosh()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f"import nosh took {elapsed:.3f} sec"
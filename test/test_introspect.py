@@ -0,0 +1,83 @@
+import io
+
+from nosh import CLI, TextToken, IntToken, StringToken, instantiate
+from nosh.introspect import tree_stats
+
+
+def ping_cli() -> CLI:
+    """ping count <Number> wait <Second> <target>, having cycles"""
+    cli = CLI(file=io.StringIO())
+    pn = TextToken(text="ping")
+    cn = TextToken(text="count")
+    wn = TextToken(text="wait")
+    tn = StringToken(mark="<target>", action=lambda p, a: None)
+    cv = IntToken(mark="<Number>", action=lambda p, a: None)
+    wv = IntToken(mark="<Second>", action=lambda p, a: None)
+    cli.append(pn, TextToken(text="show", desc="Show information"))
+    pn.append(tn, cn, wn)
+    tn.append(cn, wn)
+    cn.append(cv)
+    wn.append(wv)
+    cv.append(wn, tn)
+    wv.append(cn, tn)
+    return cli
+
+
+def test_tree_stats_cycles():
+    cli = ping_cli()
+    stats = tree_stats(cli.root)
+    assert stats.nodes == 8  # root, ping, show, count, wait, <target>, 2 ints
+    assert stats.edges == 13
+    assert stats.shared == 6
+    assert stats.depth == 3
+    assert stats.fanout == 3
+    assert stats.fanout_path == "ping"
+    assert stats.classes == {"TextToken": 5, "StringToken": 1, "IntToken": 2}
+    assert stats.memory > 0
+
+
+def test_tree_stats_deferred():
+    root = instantiate(
+        {
+            "class": TextToken,
+            "text": "show",
+            "lazy": True,
+            "leaves": [{"class": TextToken, "text": "a"}, {"class": TextToken, "text": "b"}],
+        }
+    )
+    stats = tree_stats(root)
+    assert stats.nodes == 1
+    assert stats.deferred == 2
+    assert root._pending  # not materialized
+
+
+def test_show_cli():
+    cli = ping_cli()
+    cli.enable_introspection()
+    cli.enable_introspection()
+    show = cli.root.find_leaf("show")
+    assert len(show.leaves) == 1
+
+    cli.execute("show cli statistics")
+    out = cli.file.getvalue()
+    assert "Widest fan-out:      3 (ping)" in out
+    assert "TextToken" in out
+
+    cli.file = io.StringIO()
+    cli.execute("show cli slowest")
+    assert "metrics are not enabled" in cli.file.getvalue()
+
+    cli.enable_metrics()
+    cli.execute("ping count 3 example.com")
+    cli.file = io.StringIO()
+    cli.execute("show cli slowest")
+    assert "ping count 3 example.com" in cli.file.getvalue()
+
+    cli.complete("ping count 3 ", "", 0)
+    cli.complete("ping count 3 ", "", 0)
+    cli.file = io.StringIO()
+    cli.execute("show cli caches")
+    out = cli.file.getvalue()
+    assert "Hit rate" in out
+    assert "parse" in out and "interface" in out
+    assert cli.session.parse_hits >= 1
@@ -0,0 +1,40 @@
+import os
+import sys
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+code = """
+import sys
+from nosh.__main__ import main
+rc = main(sys.argv[1:])
+import tcli
+print(tcli.sio.getvalue(), "readline" in sys.modules)
+sys.exit(rc)
+"""
+
+
+def run(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.path.join(root, "test")]))
+    return subprocess.run(
+        [sys.executable, "-c", code, *args], env=env, capture_output=True, text=True
+    )
+
+
+def test_main():
+    p = run("tcli:cli", "show", "uptime")
+    assert p.returncode == 0
+    assert p.stdout == "never up False\n"
+
+    p = run("tcli:cli", "show", "hoge")
+    assert p.returncode == 2
+    assert "show hoge < invalid syntax" in p.stderr
+
+    p = run("tcli:cli", "set", "router-id", "hoge")
+    assert p.returncode == 2
+
+    p = run("tcli:nothing", "show", "uptime")
+    assert p.returncode == 2
+    assert "nothing" in p.stderr
+
+    assert run().returncode == 2
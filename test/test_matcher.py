@@ -0,0 +1,112 @@
+import io
+
+from nosh import CLI, TextToken, StringToken, IntToken, IPv4AddressToken, SyntaxError
+from nosh.matcher import Matcher
+
+
+def act(priv, args):
+    pass
+
+
+class FlagToken(StringToken):
+    """Token whose match changes, like InterfaceToken"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.names = {"eth0"}
+
+    def match(self, text: str) -> bool:
+        return text in self.names
+
+
+def new_cli(**kwargs) -> CLI:
+    cli = CLI(file=io.StringIO(), **kwargs)
+    show = TextToken(text="show")
+    show.append(
+        TextToken(text="version", action=act),
+        TextToken(text="vrf", action=act),
+        FlagToken(mark="<ifname>", action=act),
+    )
+    ping = TextToken(text="ping")
+    target = StringToken(mark="<target>", action=act)
+    count = TextToken(text="count")
+    value = IntToken(range=(1, 10), action=act)
+    ping.append(IPv4AddressToken(action=act), target, count)
+    target.append(count)
+    count.append(value)
+    value.append(target, count)
+    cli.append(show, ping, TextToken(text="exit", action=act))
+    return cli
+
+
+def parse(cli: CLI, line: str):
+    try:
+        matched = cli._match_line(line)
+    except SyntaxError:
+        return None
+    return matched[0] if matched else None
+
+
+LINES = [
+    "show version",
+    "show vrf",
+    "show eth0",
+    "show eth1",
+    "show",
+    "show version x",
+    "ping 10.0.0.1",
+    "ping host count 3",
+    "ping host count 3 count 4",
+    "ping host count 11",
+    "ping count 3 host",
+    "ping count",
+    "  show version",
+    "exit",
+    "exi",
+    "sh ver",
+    "sh v",
+]
+
+
+def test_matcher_matches_as_cli():
+    for kwargs in [{}, {"abbrev": True}]:
+        cli = new_cli(**kwargs)
+        matcher = cli.compile()
+        for _ in range(2):  # memoized
+            for line in LINES:
+                assert matcher.match(line) is parse(cli, line), (kwargs, line)
+
+
+def test_matcher_follows_changes():
+    cli = new_cli()
+    matcher = Matcher(cli)
+    flag = cli.find(["show", FlagToken])
+    assert not matcher.match("show eth1")
+    flag.names.add("eth1")
+    assert matcher.match("show eth1") is flag
+
+    assert not matcher.match("show uptime")
+    cli.insert(["show"], TextToken(text="uptime", action=act))
+    assert matcher.match("show uptime")
+
+    cli.set_prefix(["count"])
+    assert matcher.match("ping 3") is parse(cli, "ping 3") is not None
+    cli.clear_prefix()
+
+    cli.abbrev = True
+    assert matcher.match("sh version") is parse(cli, "sh version") is not None
+    cli.abbrev = False
+    assert matcher.match("sh version") is parse(cli, "sh version") is None
+
+
+def test_validate_and_classify():
+    cli = new_cli()
+    matcher = cli.compile()
+    lines = ["show version\n", "\n", b"ping host\n", "show nothing\n", "show version"]
+    assert list(matcher.validate(lines)) == [(4, "show nothing")]
+    counts = matcher.classify(lines)
+    assert counts == {
+        cli.find(["show", "version"]): 2,
+        cli.find(["ping", StringToken]): 1,
+        None: 1,
+    }
@@ -0,0 +1,125 @@
+import io
+
+import pytest
+
+from nosh import CLI, TextToken, IntToken, SyntaxError
+from nosh.metrics import Metrics, Histogram
+
+
+def act_fail(priv, args):
+    raise RuntimeError("fail")
+
+
+def new_cli() -> CLI:
+    cli = CLI(file=io.StringIO())
+    show = TextToken(text="show")
+    show.append(TextToken(text="uptime", action=lambda p, a: None))
+    ping = TextToken(text="ping")
+    ping.append(IntToken(mark="<count>", action=lambda p, a: None))
+    cli.append(show, ping, TextToken(text="fail", action=act_fail))
+    return cli
+
+
+def test_histogram():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 2.0):
+        hist.observe(v)
+    assert hist.count == 4
+    assert hist.max == 2.0
+    assert hist.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+
+
+def test_metrics_execute():
+    cli = new_cli()
+    metrics = cli.enable_metrics()
+    assert cli.enable_metrics() is metrics
+
+    cli.execute("show uptime")
+    cli.execute("ping 1\nping 2")
+    with pytest.raises(SyntaxError):
+        cli.execute("show hoge")
+    with pytest.raises(RuntimeError):
+        cli.execute("fail")
+
+    snap = metrics.snapshot()
+    assert snap["parse"]["show uptime"]["count"] == 1
+    assert snap["parse"]["ping <count>"]["count"] == 2
+    assert snap["action"]["ping <count>"]["count"] == 2
+    assert snap["action"]["fail"]["count"] == 1
+    assert snap["error_counts"] == {"action": 1, "syntax": 1}
+    assert {"kind": "action", "path": "fail", "exception": "RuntimeError", "count": 1} in snap[
+        "errors"
+    ]
+    assert len(snap["slowest"]) == 4
+    elapsed = [s["elapsed"] for s in snap["slowest"]]
+    assert elapsed == sorted(elapsed, reverse=True)
+
+
+def test_metrics_exit_is_not_error():
+    def act_exit(priv, args):
+        raise EOFError
+
+    def act_interrupt(priv, args):
+        raise KeyboardInterrupt
+
+    cli = new_cli()
+    cli.append(
+        TextToken(text="exit", action=act_exit),
+        TextToken(text="interrupt", action=act_interrupt),
+    )
+    metrics = cli.enable_metrics()
+    for line, exc in [("exit", EOFError), ("interrupt", KeyboardInterrupt)]:
+        with pytest.raises(exc):
+            cli.execute(line)
+
+    snap = metrics.snapshot()
+    assert snap["action"]["exit"]["count"] == 1
+    assert snap["errors"] == []
+
+
+def test_metrics_complete():
+    cli = new_cli()
+    metrics = cli.enable_metrics(complete_budget=0.0)
+    cli.complete("show u", "u", 0)
+    cli.complete("show u", "u", 1)  # cached, not measured
+    cli.complete("ping ", "", 0)
+
+    snap = metrics.snapshot()
+    assert snap["complete"]["show"]["count"] == 1
+    assert snap["complete"]["ping"]["count"] == 1
+    assert snap["complete_budget_exceeded"] == 2
+
+    cli.complete("hoge fuga", "fuga", 0)
+    assert metrics.error_counts()["syntax"] == 1
+
+
+def test_metrics_slowest():
+    metrics = Metrics(slowest=2)
+    for i, elapsed in enumerate([0.3, 0.1, 0.5, 0.2]):
+        metrics.observe("action", "cmd", elapsed, f"cmd {i}")
+    assert [s["line"] for s in metrics.slowest()] == ["cmd 2", "cmd 0"]
+
+    with pytest.raises(ValueError):
+        metrics.observe("invalid", "cmd", 0.1)
+
+
+def test_metrics_prometheus(tmp_path):
+    cli = new_cli()
+    metrics = cli.enable_metrics()
+    cli.execute("show uptime")
+    with pytest.raises(RuntimeError):
+        cli.execute("fail")
+
+    text = metrics.prometheus()
+    assert "# TYPE nosh_parse_seconds histogram" in text
+    assert 'nosh_action_seconds_bucket{path="show uptime",le="+Inf"} 1' in text
+    assert 'nosh_action_seconds_count{path="show uptime"} 1' in text
+    assert 'nosh_errors_total{kind="action",path="fail",exception="RuntimeError"} 1' in text
+    assert "nosh_complete_budget_exceeded_total 0" in text
+
+    path = tmp_path / "nosh.prom"
+    metrics.write_prometheus(path)
+    assert path.read_text() == text
+
+    metrics.reset()
+    assert metrics.snapshot()["parse"] == {}
@@ -0,0 +1,144 @@
+import io
+import os
+
+from nosh import CLI, TextToken
+from nosh.pager import Pager, stream
+
+
+class TTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class Counter:
+    """generator action recording how many lines are produced"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.produced = 0
+        self.closed = False
+
+    def __call__(self, priv, args):
+        try:
+            for i in range(self.n):
+                self.produced += 1
+                yield f"line {i}"
+        finally:
+            self.closed = True
+
+
+def keys(*ks: str):
+    it = iter(ks)
+    return lambda: next(it)
+
+
+def test_pager():
+    out = io.StringIO()
+    pager = Pager(out, height=3, getch=keys(" ", "\n", "q"))
+    shown = []
+    for line in (f"{i}\n" for i in range(10)):
+        if not pager.show(line):
+            break
+        shown.append(line)
+    assert shown == ["0\n", "1\n", "2\n", "3\n", "4\n"]
+    assert out.getvalue().count("--More--") == 3
+
+
+def test_stream_closes_generator():
+    counter = Counter(100)
+    out = io.StringIO()
+    stream(counter(None, []), out, Pager(out, height=5, getch=keys("q")))
+    assert counter.produced == 5  # 4 lines shown and 1 rejected
+    assert counter.closed
+
+    counter = Counter(100)
+    stop = iter([False, False, True])
+    stream(counter(None, []), io.StringIO(), stop=lambda: next(stop))
+    assert counter.produced == 3 and counter.closed
+
+
+def test_execute_generator_action(monkeypatch):
+    counter = Counter(1000)
+    cli = CLI(file=io.StringIO())
+    cli.append(TextToken(text="show", action=counter))
+
+    # no pager for non terminals
+    cli.execute("show")
+    assert counter.produced == 1000
+    assert cli.file.getvalue().startswith("line 0\nline 1\n")
+
+    # pipe stops the generator
+    counter.produced = 0
+    cli.file = io.StringIO()
+    cli.execute("show | head 3")
+    assert cli.file.getvalue() == "line 0\nline 1\nline 2\n\n"
+    assert counter.produced == 3
+
+    # pager on terminals
+    monkeypatch.setattr("nosh.pager.read_key", keys("q"))
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: os.terminal_size((80, 11)))
+    counter.produced = 0
+    cli.file = TTY()
+    cli.execute("show")
+    assert counter.produced == 11 and counter.closed
+    assert "--More--" in cli.file.getvalue()
+
+    cli.paging = False
+    counter.produced = 0
+    cli.execute("show")
+    assert counter.produced == 1000
+
+
+def test_aexecute_streams(monkeypatch):
+    import asyncio
+    import time
+
+    closed = []
+
+    async def act_agen(priv, args):
+        try:
+            for i in range(100):
+                await asyncio.sleep(0)
+                yield f"line {i}"
+        finally:
+            closed.append(True)
+
+    cli = CLI(file=io.StringIO())
+    cli.append(TextToken(text="agen", action=act_agen))
+    cli.append(TextToken(text="show", action=Counter(100)))
+
+    # async generators are iterated, also outside of acli()
+    asyncio.run(cli.aexecute("agen | head 3"))
+    assert cli.file.getvalue() == "line 0\nline 1\nline 2\n\n"
+    assert closed == [True]
+    cli.file = io.StringIO()
+    cli.execute("agen")
+    assert cli.file.getvalue().count("line") == 100
+
+    # the pager waits for a key without blocking the loop
+    def slow_key():
+        time.sleep(0.05)
+        return "q"
+
+    monkeypatch.setattr("nosh.pager.read_key", slow_key)
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: os.terminal_size((80, 11)))
+
+    async def main(line: str) -> int:
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await cli.aexecute(line)
+        task.cancel()
+        return ticks
+
+    for line in ("agen", "show"):
+        cli.file = TTY()
+        assert asyncio.run(main(line)) >= 3
+        assert cli.file.getvalue().count("line") == 10
+        assert "--More--" in cli.file.getvalue()
@@ -0,0 +1,124 @@
+import io
+
+import pytest
+
+from nosh import CLI, TextToken, SyntaxError
+from nosh.pipe import Pipe, Head, Last, Match, split
+
+
+def act_show_log(priv, args):
+    for i in range(1000):
+        print(f"line {i} {'error' if i % 100 == 0 else 'ok'}")
+
+
+def act_show_file(priv, args):
+    c: CLI = priv
+    c.file.write("first\nsecond\nthi")
+    c.file.write("rd\n")
+
+
+def new_cli() -> CLI:
+    cli = CLI(file=io.StringIO())
+    cli.private = cli
+    show = TextToken(text="show")
+    show.append(
+        TextToken(text="log", action=act_show_log),
+        TextToken(text="file", action=act_show_file),
+    )
+    cli.append(show)
+    return cli
+
+
+def output(cli: CLI, line: str) -> str:
+    cli.file = io.StringIO()
+    cli.execute(line)
+    return cli.file.getvalue()
+
+
+def test_split():
+    assert split("show log") == ("show log", [])
+    assert split("show log | match a|b") == ("show log", [["match", "a|b"]])
+    assert split("show log | except ok | count") == (
+        "show log",
+        [["except", "ok"], ["count"]],
+    )
+    with pytest.raises(SyntaxError):
+        split("show log |")
+    with pytest.raises(SyntaxError):
+        split("show log | | count")
+
+
+def test_pipe_writer():
+    out = io.StringIO()
+    pipe = Pipe([Match(["b"])], out)
+    pipe.write("a\nb")
+    pipe.write("b\nc\nbb")
+    assert out.getvalue() == "bb\n"
+    pipe.close()
+    assert out.getvalue() == "bb\nbb\n"
+
+    head = Head(["2"])
+    pipe = Pipe([head, Last(["1"])], io.StringIO())
+    pipe.write("1\n2\n")
+    assert pipe.done
+    pipe.write("3\n")
+    pipe.close()
+    assert pipe.file.getvalue() == "2\n"
+
+
+def test_execute_pipe(tmp_path):
+    cli = new_cli()
+    assert output(cli, "show log | match error") == "".join(
+        f"line {i} error\n" for i in range(0, 1000, 100)
+    ) + "\n"
+    assert output(cli, "show log | except ok | count") == "Count: 10 lines\n\n"
+    assert output(cli, "show log | count") == "Count: 1000 lines\n\n"
+    assert output(cli, "show log | head 2") == "line 0 error\nline 1 ok\n\n"
+    assert output(cli, "show log | last 1") == "line 999 ok\n\n"
+    assert output(cli, "show file | match ^[ft]") == "first\nthird\n\n"
+
+    path = tmp_path / "log.txt"
+    assert output(cli, f"show log | match error | save {path}") == (
+        f"Wrote 10 lines of output to '{path}'\n\n"
+    )
+    assert path.read_text().count("\n") == 10
+
+    for line in [
+        "show log | grep error",
+        "show log | count 1",
+        "show log | head x",
+        "show log | match (",
+    ]:
+        with pytest.raises(SyntaxError):
+            cli.execute(line)
+
+
+def test_save_opened_after_parsing(tmp_path):
+    cli = new_cli()
+    path = tmp_path / "log.txt"
+    path.write_text("keep\n")
+    with pytest.raises(SyntaxError):
+        cli.execute(f"show log | save {path} | bogus")
+    with pytest.raises(SyntaxError):
+        cli.execute(f"show log | save {path} | head x")
+    assert path.read_text() == "keep\n"
+
+    with pytest.raises(SyntaxError):
+        cli.execute(f"show log | save {tmp_path}/no/such/file")
+
+
+def test_complete_pipe():
+    cli = new_cli()
+    assert [c for c, _ in cli.candidates("show log | ", "")] == [
+        "match",
+        "except",
+        "count",
+        "head",
+        "last",
+        "save",
+    ]
+    assert [c for c, _ in cli.candidates("show log | c", "c")] == ["count"]
+    assert cli.candidates("show log | match ", "") == [
+        ("<regex>", "Show only lines that match a pattern")
+    ]
+    assert cli.complete("show log | match error | h", "h", 0) == "head "
@@ -0,0 +1,58 @@
+import asyncio
+
+from nosh.server import CLIServer
+from tcli import cli
+
+
+async def request(reader, writer, line: str) -> str:
+    writer.write(line.encode() + b"\n")
+    await writer.drain()
+    return (await reader.readuntil(b"> ")).decode()
+
+
+def test_server_sessions(tmp_path):
+    path = str(tmp_path / "nosh.sock")
+
+    async def main():
+        server = CLIServer(cli)
+        s = await server.start_unix(path)
+
+        r1, w1 = await asyncio.open_unix_connection(path)
+        r2, w2 = await asyncio.open_unix_connection(path)
+        assert await r1.readuntil(b"> ") == b"> "
+        assert await r2.readuntil(b"> ") == b"> "
+
+        assert "never up" in await request(r1, w1, "show uptime")
+        assert "< invalid syntax" in await request(r1, w1, "invalid syntax")
+
+        out = await request(r1, w1, "show sys?")
+        assert "Possible completions:" in out
+        assert "system" in out and "sysmet" in out
+        assert "show uptime" in await request(r1, w1, "show upt\t")
+
+        # edit prefix is per session
+        await request(r1, w1, "edit")
+        assert "set edit-test test1" in await request(r1, w1, "set test1")
+        assert "< invalid syntax" in await request(r2, w2, "set test1")
+
+        stats = {st["id"]: st for st in server.stats()}
+        assert len(stats) == 2
+        assert sum(st["commands"] for st in stats.values()) == 7
+        assert all(st["latency_max"] >= st["latency_mean"] for st in stats.values())
+
+        # clients cannot write files
+        saved = tmp_path / "out.txt"
+        out = await request(r2, w2, f"show uptime | save {saved}")
+        assert "| save < not allowed in this session" in out
+        assert not saved.exists()
+        assert "save" not in await request(r2, w2, "show uptime | ?")
+
+        for w in (w1, w2):
+            w.close()
+            await w.wait_closed()
+        while server.sessions:
+            await asyncio.sleep(0.01)
+        s.close()
+        await s.wait_closed()
+
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import io
+
+import pytest
+
+import nosh.snapshot
+from nosh import CLI, instantiate
+from nosh.snapshot import dump, load, cached
+from tcli import show_tree, set_tree, act_test_ok
+
+
+def build():
+    return instantiate(set_tree)
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = tmp_path / "set.snapshot"
+    source = tmp_path / "spec.py"
+    source.write_text("spec = 1\n")
+
+    dump(build(), path, [source])
+    root = load(path, [source])
+    assert root is not None
+
+    c = CLI(file=io.StringIO())
+    c.private = c
+    c.append(root)
+    assert c.complete("set route-map ", "", 0) is None
+    assert "<route-map>" in c.file.getvalue()
+    assert c.find(["set", "router-id"]).desc == "desc set router-id"
+    assert c.find(["set", "route-map"]).find_leaf("text").desc == "desc text"
+    c.execute("set route-map foo permit")
+    assert "set route-map foo permit" in c.file.getvalue()
+    assert c.find(["set", "router-id"]).leaves[0].action is act_test_ok
+
+    # invalidated when the source changes
+    source.write_text("spec = 2\n")
+    assert load(path, [source]) is None
+
+
+def test_snapshot_version(tmp_path, monkeypatch):
+    path = tmp_path / "set.snapshot"
+    dump(build(), path)
+    assert load(path) is not None
+    monkeypatch.setattr(nosh.snapshot, "__version__", "0.0.0-test")
+    assert load(path) is None
+
+
+def test_snapshot_cached(tmp_path):
+    path = tmp_path / "set.snapshot"
+    built = []
+
+    def counting_build():
+        built.append(1)
+        return build()
+
+    r1 = cached(path, counting_build)
+    r2 = cached(path, counting_build)
+    assert len(built) == 1
+    assert r1 is not r2 and r2.text == "set"
+
+    # lambdas cannot be stored, but the built tree is returned
+    lambda_path = tmp_path / "show.snapshot"
+    with pytest.warns(UserWarning):
+        root = cached(lambda_path, lambda: instantiate(show_tree))
+    assert root.text == "show"
+    assert not lambda_path.exists()
+
+
+def test_snapshot_untrusted(tmp_path):
+    path = tmp_path / "set.snapshot"
+    dump(build(), path)
+    assert path.stat().st_mode & 0o022 == 0
+    assert load(path) is not None
+
+    path.chmod(0o666)
+    with pytest.warns(UserWarning):
+        assert load(path) is None
+    path.chmod(0o644)
+
+    tmp_path.chmod(0o777)
+    try:
+        with pytest.warns(UserWarning):
+            assert load(path) is None
+    finally:
+        tmp_path.chmod(0o700)
+
+
+def test_snapshot_keywords(tmp_path, monkeypatch):
+    from nosh import SyntaxError
+    from nosh.suggest import KeywordIndex
+
+    path = tmp_path / "set.snapshot"
+    dump(build(), path)
+    # a new process has no keywords until the tree is loaded
+    monkeypatch.setattr(nosh.suggest, "keywords", KeywordIndex())
+    c = CLI(file=io.StringIO())
+    c.append(load(path))
+    with pytest.raises(SyntaxError) as e:
+        c.execute("set ruote-map")
+    assert e.value.suggestions == ["route-map"]
@@ -0,0 +1,115 @@
+import io
+import random
+
+import pytest
+
+from nosh import CLI, TextToken, SyntaxError
+from nosh.suggest import KeywordIndex, distance, suggest
+
+
+def levenshtein(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def test_distance():
+    rand = random.Random(0)
+    for _ in range(2000):
+        a = "".join(rand.choices("abc", k=rand.randint(0, 12)))
+        b = "".join(rand.choices("abc", k=rand.randint(0, 12)))
+        assert distance(a, b) == levenshtein(a, b), (a, b)
+
+
+def test_keyword_index():
+    index = KeywordIndex()
+    for keyword in ["show", "shutdown", "route", "router", "router-id"]:
+        index.add(keyword)
+    index.add("show")
+    assert len(index) == 5
+    assert index.search("shwo") == [(2, "show")]
+    assert index.search("rote", 1) == [(1, "route")]
+    assert index.search("routr") == [(1, "route"), (1, "router")]
+    assert index.search("xyz") == []
+
+
+def act(priv, args):
+    pass
+
+
+def test_suggestions():
+    cli = CLI(file=io.StringIO())
+    show = TextToken(text="show")
+    show.append(
+        TextToken(text="neighbor", action=act),
+        TextToken(text="neighbors", action=act),
+    )
+    cli.append(show, TextToken(text="neighbour", action=act))
+
+    with pytest.raises(SyntaxError) as e:
+        cli.execute("shwo neighbor")
+    assert str(e.value) == "shwo neighbor < invalid syntax"
+    assert e.value.suggestions == ["show"]
+    assert e.value.report() == (
+        "  shwo neighbor < invalid syntax\n  Did you mean: show?"
+    )
+
+    # leaves of the failed node come first
+    with pytest.raises(SyntaxError) as e:
+        cli.execute("show neighbour")
+    assert e.value.suggestions == ["neighbor", "neighbors", "neighbour"]
+    assert suggest("neighbour") == ["neighbour", "neighbor", "neighbors"]
+
+    with pytest.raises(SyntaxError) as e:
+        cli.execute("show zzzzzz")
+    assert e.value.suggestions == []
+    assert e.value.report() == "  show zzzzzz < invalid syntax"
+
+
+def test_keyword_index_limits():
+    index = KeywordIndex()
+    index.add("interfaces")
+    # a deletion from each side
+    assert index.search("interfcaes") == [(2, "interfaces")]
+    assert index.search("nterfacesx") == [(2, "interfaces")]
+    # two characters missing need two deletions from the keyword
+    assert distance("interace", "interfaces") == 2
+    assert index.search("interace") == []
+    assert index.search("interace", 3) == []
+
+
+def test_keyword_index_release():
+    index = KeywordIndex()
+    index.add("route")
+    index.add("route")
+    index.add("router")
+    for _ in range(1000):
+        index.add("route")
+        index.release(["route"])
+    assert len(index._queue) == 2
+    index.release(["route", "router"])
+    assert len(index) == 1
+    index.release(["route"])
+    assert len(index) == 0
+    assert index.search("route") == []
+    assert index._index == {}
+    index.add("route")
+    assert index.search("rout") == [(1, "route")]
+
+
+def test_keywords_of_collected_tree(monkeypatch):
+    import gc
+    import nosh.token
+
+    index = KeywordIndex()
+    monkeypatch.setattr(nosh.token, "keywords", index)
+    cli = CLI(file=io.StringIO())
+    cli.append(TextToken(text="unique-keyword", action=act))
+    assert index.search("unique-keywrod") == [(2, "unique-keyword")]
+    del cli
+    gc.collect()
+    assert index.search("unique-keywrod") == []
@@ -175,3 +175,496 @@ def test_set_prefix():
     cli.clear_prefix()
     test_complete_at_1st_level()
     test_complete_at_2nd_level()
+
+
+def test_execute_stream():
+    clear_sio()
+    lines = ["set router-id 1.1.1.1", "show uptime", "invalid syntax", "show uptime"]
+
+    with pytest.raises(ExecuteError) as e:
+        cli.execute_stream(lines)
+    assert e.value.lineno == 3
+    assert isinstance(e.value.error, SyntaxError)
+    assert sio.getvalue().count("never up") == 1
+
+    clear_sio()
+    report = cli.execute_stream(iter(lines), stop_on_error=False)
+    assert report.lines == 4
+    assert [err.lineno for err in report.errors] == [3]
+    assert sio.getvalue().count("never up") == 2
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_execute_file(tmp_path, use_mmap):
+    path = tmp_path / "config"
+    path.write_text("set router-id 1.1.1.1\r\nshow uptime\n" * 100)
+
+    progress = []
+    clear_sio()
+    report = cli.execute_file(
+        path, use_mmap=use_mmap, progress=progress.append, progress_interval=50
+    )
+    assert report.lines == 200
+    assert not report.errors
+    assert len(progress) == 4
+    assert sio.getvalue().count("never up") == 100
+    assert "set router-id 1.1.1.1\n" in sio.getvalue()
+
+
+def test_complete_reuses_parse_state(monkeypatch):
+    # a local CLI, as leaves are appended below
+    cli = CLI(file=io.StringIO())
+    cli.append(instantiate(show_tree))
+    calls = []
+    show = cli.find(["show"])
+    match_leaf = show.match_leaf
+
+    def counting_match_leaf(text):
+        calls.append(text)
+        return match_leaf(text)
+
+    monkeypatch.setattr(show, "match_leaf", counting_match_leaf)
+
+    assert cli.complete("show sy", "sy", 0) == "system "
+    assert calls == ["sy"]
+    assert cli.complete("show sy", "sy", 1) == "sysmet "
+    assert cli.complete("show sy", "sy", 2) == None
+    assert calls == ["sy"]  # states > 0 reuse candidates
+    assert cli.complete("show sys", "sys", 0) == "system "
+    assert calls == ["sy", "sys"]  # only the last word is matched
+
+    show.append(TextToken(text="systemd", desc="systemd"))
+    assert cli.complete("show sys", "sys", 2) == "systemd "
+
+
+def test_parse_cache_per_cli():
+    a = CLI(file=io.StringIO())
+    b = CLI(file=io.StringIO())
+    a.append(TextToken(text="show"))
+    a.insert(["show"], TextToken(text="alpha"))
+    b.append(TextToken(text="show"))
+    b.insert(["show"], TextToken(text="beta"))
+    found = []
+
+    def act_nest(priv, args):
+        found.extend(b.candidates("show b", "b"))
+
+    a.append(TextToken(text="nest", action=act_nest))
+
+    s = Session(file=io.StringIO())
+    assert a.candidates("show a", "a", session=s) == [("alpha", "")]
+    # the tokens of a cached for "show" are not used by b
+    assert b.candidates("show b", "b", session=s) == [("beta", "")]
+    a.execute("nest")
+    assert found == [("beta", "")]
+
+
+def test_parse_cache_interfaces(monkeypatch):
+    from nosh.interface import interface_cache, InterfaceBackend, Link
+
+    class StaticBackend(InterfaceBackend):
+        def __init__(self, names: list[str]):
+            self.names = names
+
+        def links(self) -> list[Link]:
+            return [Link(n) for n in self.names]
+
+    backend = StaticBackend(["eth0"])
+    monkeypatch.setattr(interface_cache, "_backend", backend)
+    interface_cache.invalidate()
+
+    cli = CLI(file=io.StringIO())
+    cli.append(TextToken(text="interface"))
+    cli.insert(["interface"], InterfaceToken())
+    cli.insert(["interface", InterfaceToken], TextToken(text="mtu"))
+    assert cli.candidates("interface eth0 m", "m") == [("mtu", "")]
+
+    backend.names.remove("eth0")
+    interface_cache.invalidate()
+    with pytest.raises(SyntaxError):
+        cli.candidates("interface eth0 m", "m")
+    interface_cache.invalidate()
+
+
+def test_aexecute_coroutine_action():
+    import asyncio
+
+    out = io.StringIO()
+    acli = CLI(file=out)
+
+    async def act_slow(priv, args):
+        await asyncio.sleep(0.05)
+        out.write(" ".join(args))
+
+    acli.append(TextToken(text="slow", action=act_slow))
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await acli.aexecute("slow")
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    assert len(ticks) > 1  # the loop serviced other tasks during the action
+    assert out.getvalue() == "slow\n"
+
+    # coroutine actions also run from the synchronous execute()
+    out.truncate(0)
+    out.seek(0)
+    acli.execute("slow")
+    assert out.getvalue() == "slow\n"
+
+
+def test_awaitable_completion_candidates():
+    class AsyncToken(StringToken):
+        async def _candidates(self, text):
+            return [(self.mark, self.desc), ("async-candidate", "")]
+
+        def completion_candidates(self, text):
+            return self._candidates(text)
+
+    acli = CLI(file=io.StringIO())
+    acli.append(TextToken(text="async", desc="async"))
+    acli.insert(["async"], AsyncToken(mark="<async>", regex=r"^async-\S+$"))
+
+    assert acli.complete("async a", "a", 0) == "async-candidate "
+
+
+def test_background_jobs():
+    import threading
+    from nosh.job import current_job
+
+    out = io.StringIO()
+    jcli = CLI(file=out)
+    jcli.enable_jobs(max_workers=1)
+    started = threading.Event()
+
+    def act_slow(priv, args):
+        started.set()
+        while not current_job().killed.wait(0.01):
+            pass
+        print("killed " + " ".join(args))
+
+    def act_echo(priv, args):
+        print(" ".join(args))
+
+    jcli.append(
+        TextToken(text="slow", action=act_slow),
+        TextToken(text="echo", action=act_echo),
+    )
+
+    jcli.execute("slow &")
+    jcli.execute("echo&")
+    started.wait()
+    assert "[1] slow" in out.getvalue()
+    assert "[2] echo" in out.getvalue()
+
+    out.truncate(0)
+    out.seek(0)
+    jcli.execute("jobs")
+    assert "[1] Running  slow" in out.getvalue()
+    assert "[2] Pending  echo" in out.getvalue()
+
+    jcli.execute("kill 1")
+    out.truncate(0)
+    out.seek(0)
+    jcli.execute("fg 2")
+    assert "echo\n" in out.getvalue()
+    assert jcli.jobs.get(1) is None or jcli.jobs.get(1).killed.is_set()
+
+    out.truncate(0)
+    out.seek(0)
+    jcli.execute("fg 3")
+    assert "no such job" in out.getvalue()
+    jcli.jobs.shutdown()
+
+
+def test_fg_after_jobs():
+    import asyncio
+
+    out = io.StringIO()
+    jcli = CLI(file=out)
+    jcli.enable_jobs(max_workers=1)
+
+    def act_echo(priv, args):
+        print(" ".join(args))
+
+    async def act_aecho(priv, args):
+        await asyncio.sleep(0.01)
+        print(" ".join(args))
+
+    jcli.append(
+        TextToken(text="echo", action=act_echo),
+        TextToken(text="aecho", action=act_aecho),
+    )
+
+    jcli.execute("echo &")
+    jcli.jobs.get(1).future.result()
+    jcli.execute("jobs")
+    assert "[1] Done     echo" in out.getvalue()
+
+    # the finished job is kept until fg shows its output
+    out.truncate(0)
+    out.seek(0)
+    jcli.execute("fg 1")
+    assert "echo\n" in out.getvalue()
+    assert jcli.jobs.get(1) is None
+
+    # jobs listed as finished are removed by the next jobs
+    jcli.execute("echo &")
+    jcli.jobs.get(2).future.result()
+    jcli.execute("jobs")
+    jcli.execute("jobs")
+    assert jcli.jobs.get(2) is None
+
+    # & in aexecute() runs the action in background too
+    async def main():
+        await jcli.aexecute("aecho &")
+
+    out.truncate(0)
+    out.seek(0)
+    asyncio.run(main())
+    assert "[3] aecho" in out.getvalue()
+    jcli.execute("fg 3")
+    assert "aecho\n" in out.getvalue()
+    jcli.jobs.shutdown()
+
+
+def test_sessions():
+    # a local CLI, as leaves are appended below
+    cli = CLI(file=io.StringIO())
+    cli.append(
+        instantiate(show_tree), instantiate(set_tree), instantiate(edit_tree)
+    )
+    cli.private = cli
+    s1 = Session(file=io.StringIO(), private=cli)
+    s2 = Session(file=io.StringIO(), private=cli)
+
+    cli.execute("edit", session=s1)
+    assert s1.prefix == ["edit-test"]
+    assert s2.prefix == [] and cli.get_prefix() == []
+
+    cli.execute("set test1", session=s1)
+    assert s1.file.getvalue() == "\nset edit-test test1\n"
+    with pytest.raises(SyntaxError):
+        cli.execute("set test1", session=s2)
+
+    assert cli.complete("set ", "", 0, session=s1) == None
+    assert "test1-desc" in s1.file.getvalue()
+    assert cli.complete("s", "s", 1, session=s2) == "set "
+
+    sessions = []
+    cli.append(
+        TextToken(text="whoami", action=lambda p, a: sessions.append(current_session()))
+    )
+    cli.execute("whoami", session=s2)
+    cli.execute("whoami")
+    assert sessions == [s2, cli.session]
+
+
+def test_nested_cli_sessions():
+    # an action of a switches to b, e.g., global -> configure mode
+    a = CLI(file=io.StringIO(), private="A")
+    b = CLI(file=io.StringIO(), private="B")
+    seen = []
+
+    def act_beta(priv, args):
+        seen.append((priv, current_session()))
+        b.file.write("beta")
+
+    b.append(TextToken(text="show", action=act_beta))
+    b.insert(["show"], TextToken(text="beta", action=act_beta))
+    a.append(
+        TextToken(text="configure", action=lambda p, args: b.execute("show beta"))
+    )
+
+    s = Session(file=io.StringIO(), private="S")
+    a.execute("configure", session=s)
+    assert seen == [("B", b.session)]
+    assert b.file.getvalue().startswith("beta")
+    assert s.file.getvalue() == "\n"
+
+
+def test_instantiate_lazy():
+    built = []
+
+    def factory():
+        built.append("factory")
+        return [TextToken(text=f"knob{n}", action=act_test_ok) for n in range(3)]
+
+    tree = {
+        "class": TextToken,
+        "text": "lazy",
+        "desc": "lazy subtree",
+        "leaves": [
+            {"class": TextToken, "text": "static", "action": act_test_ok},
+            factory,
+        ],
+    }
+    lazy = instantiate(tree, lazy=True)
+    assert lazy._pending and not built
+
+    lcli = CLI(file=io.StringIO())
+    lcli.private = lcli
+    lcli.append(lazy)
+    assert lcli.complete("lazy k", "k", 0) == "knob0 "
+    assert built == ["factory"]
+    assert lcli.find(["lazy", "static"]).text == "static"
+    lcli.execute("lazy knob2")
+    assert built == ["factory"]  # materialized only once
+    assert "lazy knob2" in lcli.file.getvalue()
+
+    eager = instantiate(tree)
+    assert not eager._pending and built == ["factory", "factory"]
+    assert [t.text for t in eager.leaves] == ["static", "knob0", "knob1", "knob2"]
+
+
+def test_run_argv(capsys):
+    s = Session(file=io.StringIO(), private=cli)
+    assert cli.run_argv(["set", "route-map", "test-map", "permit"], session=s) == EXIT_OK
+    assert s.file.getvalue() == "set route-map test-map permit"
+
+    assert cli.run_argv(["set", "route-map"], session=s) == EXIT_SYNTAX
+    assert cli.run_argv(["hoge"], session=s) == EXIT_SYNTAX
+    assert cli.run_argv([], session=s) == EXIT_SYNTAX
+    assert "hoge < invalid syntax" in capsys.readouterr().err
+
+    c = CLI(file=io.StringIO())
+    words = []
+    desc = TextToken(text="description")
+    desc.append(StringToken(mark="<text>", regex=r"^.+$", action=lambda p, a: words.extend(a)))
+    c.append(desc, TextToken(text="ng", action=act_test_ng))
+    assert c.run_argv(["description", "uplink to core"]) == EXIT_OK
+    assert words == ["description", "uplink to core"]
+    assert c.run_argv(["ng"]) == EXIT_ERROR
+    assert "RuntimeError" in capsys.readouterr().err
+
+
+def test_abbreviation():
+    args = []
+    c = CLI(file=io.StringIO(), abbrev=True)
+    show = TextToken(text="show")
+    show.append(
+        TextToken(text="interfaces", action=lambda p, a: args.append(a)),
+        TextToken(text="ip", action=lambda p, a: args.append(a)),
+    )
+    ping = TextToken(text="ping")
+    ping.append(StringToken(mark="<target>", action=lambda p, a: args.append(a)))
+    c.append(show, ping)
+
+    c.execute("sh int")
+    assert args.pop() == ["show", "interfaces"]
+    c.execute("sh ip")
+    assert args.pop() == ["show", "ip"]
+
+    # dynamic tokens precede abbreviations
+    c.execute("p sh")
+    assert args.pop() == ["ping", "sh"]
+
+    with pytest.raises(SyntaxError) as e:
+        c.execute("sh i")
+    assert e.value.candidates == ["interfaces", "ip"]
+    assert "ambiguous" in str(e.value)
+
+    assert c.complete("sh in", "in", 0) == "interfaces "
+
+    c.abbrev = False
+    with pytest.raises(SyntaxError):
+        c.execute("sh int")
+
+
+def test_parse_result_values():
+    import ipaddress
+
+    args = []
+    c = CLI(file=io.StringIO(), abbrev=True)
+    ping = TextToken(text="ping")
+    count = TextToken(text="count")
+    target = IPv4AddressToken(action=lambda p, a: args.append(a))
+    count.append(IntToken(range=(1, 100), action=lambda p, a: args.append(a)))
+    ping.append(count, target)
+    target.append(count)
+    c.append(ping)
+
+    c.execute("ping 10.0.0.1 co 5")
+    a = args.pop()
+    assert isinstance(a, ParseResult)
+    assert a == ["ping", "10.0.0.1", "count", "5"]
+    assert a.values == ["ping", ipaddress.IPv4Address("10.0.0.1"), "count", 5]
+
+    with pytest.raises(SyntaxError):
+        c.execute("ping 10.0.0.1 count 500")
+
+
+def test_named_params():
+    calls = []
+
+    def act_ping(priv, args, target=None, count=None):
+        calls.append((args.tokens, target, count))
+
+    c = CLI(file=io.StringIO())
+    c.append(
+        instantiate(
+            {
+                "class": TextToken,
+                "text": "ping",
+                "leaves": [
+                    {
+                        "class": StringToken,
+                        "mark": "<target>",
+                        "name": "target",
+                        "action": act_ping,
+                        "leaves": [
+                            {
+                                "class": TextToken,
+                                "text": "count",
+                                "leaves": [
+                                    {
+                                        "class": IntToken,
+                                        "name": "count",
+                                        "action": act_ping,
+                                    }
+                                ],
+                            }
+                        ],
+                    }
+                ],
+            }
+        )
+    )
+
+    c.execute("ping host")
+    assert calls.pop()[1:] == ("host", None)
+    c.execute("ping host count 3")
+    tokens, target, count = calls.pop()
+    assert (target, count) == ("host", 3)
+    assert [type(t) for t in tokens] == [TextToken, StringToken, TextToken, IntToken]
+    assert tokens[-1] is c.find(["ping", StringToken, "count", IntToken])
+
+
+def test_match_leaf_override():
+    from nosh.matcher import Matcher
+
+    class AliasToken(TextToken):
+        def match_leaf(self, text):
+            return super().match_leaf({"sh": "show"}.get(text, text))
+
+    ran = []
+    c = CLI(file=io.StringIO())
+    top = AliasToken(text="top")
+    show = TextToken(text="show")
+    show.append(StringToken(mark="<x>", name="x", action=lambda p, a, x: ran.append(x)))
+    top.append(show)
+    c.append(top)
+
+    c.execute("top sh x")
+    assert ran == ["x"]
+    assert c.candidates("top sh ", "") == [("<x>", "")]
+    assert Matcher(c).match("top sh x") is c.find(["top", "show", StringToken])
@@ -1,3 +1,6 @@
+import os
+import socket
+
 import pytest
 
 from nosh.token import (
@@ -14,6 +17,7 @@ from nosh.token import (
     IPv6NetworkToken,
     ChoiceToken,
 )
+from nosh.interface import interface_cache, InterfaceBackend, Link
 
 
 param_make_valid_token = [
@@ -220,3 +224,250 @@ def test_choice_token_completion():
     assert t.completion_candidates("a") == [("asdf", "desc asdf")]
     assert t.completion_candidates("q") == [("qwer", "desc qwer")]
     assert t.completion_candidates("n") == [("nodesc", "")]
+
+
+def test_match_leaf_wide_node():
+    t0 = TextToken(text="root")
+    leaves = [TextToken(text=f"knob{n}") for n in range(500)]
+    s1 = StringToken(mark="<str>")
+    i1 = IntToken()
+    t0.append(s1, *leaves, i1)
+
+    assert t0.match_leaf("knob0") == leaves[0]
+    assert t0.match_leaf("knob499") == leaves[499]
+    assert t0.match_leaf("10") == s1  # same priority, appended first
+    assert t0.match_leaf("not-a-knob") == s1
+    assert t0.find_leaf("knob42") == leaves[42]
+    assert t0.find_leaf(IntToken) == i1
+    assert t0.find_leaf(StringToken) == s1
+    assert t0.find_leaf("no-such-knob") is None
+
+
+def test_match_leaf_priority():
+    class PrioritizedToken(StringToken):
+        @property
+        def priority(self) -> int:
+            return 10
+
+    t0 = TextToken(text="root")
+    t1 = TextToken(text="t1")
+    p1 = PrioritizedToken(mark="<str>")
+    t0.append(t1)
+    assert t0.match_leaf("t1") == t1
+    t0.append(p1)
+    assert t0.match_leaf("t1") == p1  # lower priority is evaluated first
+
+
+def test_complete_wide_node():
+    t0 = TextToken(text="root")
+    leaves = [TextToken(text=f"knob{n}", desc=f"desc{n}") for n in range(500)]
+    s1 = StringToken(mark="<str>", desc="str")
+    t0.append(s1, *leaves)
+
+    assert t0.complete("knob49", [t0]) == [
+        ("knob49", "desc49"),
+        ("knob490", "desc490"),
+        ("knob491", "desc491"),
+        ("knob492", "desc492"),
+        ("knob493", "desc493"),
+        ("knob494", "desc494"),
+        ("knob495", "desc495"),
+        ("knob496", "desc496"),
+        ("knob497", "desc497"),
+        ("knob498", "desc498"),
+        ("knob499", "desc499"),
+        ("<str>", "str"),
+    ]
+    assert t0.complete("x", [t0]) == [("<str>", "str")]
+    assert len(t0.complete("", [t0])) == 501
+
+
+def test_complete_overridden_and_duplicate_leaves():
+    class FancyToken(TextToken):
+        def completion_candidates(self, text):
+            return [("fancy-" + self.text, "x")]
+
+    t0 = TextToken(text="root")
+    t0.append(FancyToken(text="abc"), TextToken(text="abd", desc="1"))
+    assert t0.complete("ab", [t0]) == [("fancy-abc", "x"), ("abd", "1")]
+    assert t0.complete("", [t0]) == [("fancy-abc", "x"), ("abd", "1")]
+
+    # leaves sharing a text are listed for a prefix as for ""
+    t0.append(TextToken(text="abd", desc="2"))
+    expected = [("fancy-abc", "x"), ("abd", "1"), ("abd", "2")]
+    assert t0.complete("ab", [t0]) == expected
+    assert t0.complete("", [t0]) == expected
+
+
+def test_interface_token_cache(monkeypatch):
+    class StaticBackend(InterfaceBackend):
+        def __init__(self, names: list[str]):
+            self.names = names
+
+        def links(self) -> list[Link]:
+            return [Link(n, operstate="up") for n in self.names]
+
+    backend = StaticBackend(["eth0", "eth1", "lo"])
+    monkeypatch.setattr(interface_cache, "_backend", backend)
+    interface_cache.invalidate()
+
+    t = InterfaceToken(regex="e.*")
+    assert t.match("eth1")
+    assert not t.match("lo")
+    assert t.completion_candidates("eth") == [
+        (t.mark, t.desc),
+        ("eth0", "up"),
+        ("eth1", "up"),
+    ]
+
+    backend.names.append("eth2")
+    assert not t.match("eth2")  # cached until ttl expires or invalidated
+    interface_cache.invalidate()
+    assert t.match("eth2")
+    interface_cache.invalidate()
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_NETLINK"), reason="requires netlink")
+def test_netlink_dump_links():
+    from nosh.netlink import dump_links
+
+    links = {link.name: link for link in dump_links()}
+    assert set(links) == set(os.listdir("/sys/class/net"))
+    assert links["lo"].index == 1
+
+
+def test_netlink_fallback(monkeypatch):
+    import errno
+    import nosh.netlink
+    from nosh.interface import InterfaceCache
+    from nosh.netlink import NetlinkBackend
+
+    with pytest.raises(TypeError):
+        InterfaceBackend()
+
+    class StaticBackend(InterfaceBackend):
+        def links(self) -> list[Link]:
+            return [Link("eth0")]
+
+    class BrokenSocket:
+        def recv(self, size):
+            raise OSError(errno.EIO, "broken")
+
+        def close(self):
+            pass
+
+    def dump_links():
+        raise OSError(errno.EPERM, "error reply")
+
+    monkeypatch.setattr(nosh.netlink, "dump_links", dump_links)
+    with pytest.raises(OSError):
+        NetlinkBackend().links()
+
+    backend = NetlinkBackend(StaticBackend())
+    backend._sock = BrokenSocket()
+    cache = InterfaceCache(backend)
+    assert cache.names() == ["eth0"]
+    assert not backend.notifies and not backend._sock
+    assert not backend.changed()
+
+    backend = NetlinkBackend(StaticBackend())
+    backend._sock = BrokenSocket()
+    assert backend.changed()
+    assert not backend.notifies
+    assert [link.name for link in backend.links()] == ["eth0"]
+
+
+def test_expand():
+    root = TextToken(text="root")
+    root.append(TextToken(text="show"), TextToken(text="set"), TextToken(text="settings"))
+    assert root.expand("sh") == ["show"]
+    assert root.expand("se") == ["set", "settings"]
+    assert root.expand("sett") == ["settings"]
+    assert root.expand("x") == []
+
+    # the prefix index is maintained by append
+    root.append(TextToken(text="shutdown"))
+    assert root.expand("sh") == ["show", "shutdown"]
+    assert root.expand("sho") == ["show"]
+    assert root.expand("shu") == ["shutdown"]
+
+
+def test_match_value():
+    import ipaddress
+
+    from nosh.token import NOMATCH
+
+    assert IntToken(range=(0, 10)).match_value("0") == 0
+    assert IntToken(range=(0, 10)).match_value("11") is NOMATCH
+    assert FloatToken().match_value("1.5") == 1.5
+    assert IPv4AddressToken().match_value("10.0.0.1") == ipaddress.IPv4Address("10.0.0.1")
+    assert IPv4NetworkToken().match_value("10.0.0.0/8") == ipaddress.IPv4Network("10.0.0.0/8")
+    assert InterfaceAddressToken().match_value("10.0.0.1/8") == ipaddress.ip_interface(
+        "10.0.0.1/8"
+    )
+    assert IPv4AddressToken().match_value("10.0.0.256") is NOMATCH
+    assert StringToken(mark="<s>").match_value("abc") == "abc"
+
+    root = TextToken(text="root")
+    count = TextToken(text="count")
+    num = IntToken()
+    root.append(count, num)
+    assert root.match_leaf_value("count") == (count, "count")
+    assert root.match_leaf_value("3") == (num, 3)
+    assert root.match_leaf_value("x") == (None, NOMATCH)
+
+
+def test_word_classes():
+    import random
+
+    from nosh.token import classify, _traits, DIGIT, ALPHA, DOT, COLON, SLASH, OTHER
+
+    assert classify("100") == DIGIT
+    assert classify("10.0.0.1") == DIGIT | DOT
+    assert classify("2001:db8::/64") == DIGIT | ALPHA | COLON | SLASH
+    assert classify("-1") == DIGIT | OTHER
+    assert classify("route-map") == ALPHA | OTHER
+
+    # pruning by word classes never rejects a word that matches
+    rand = random.Random(0)
+    chars = "0123456789abcdefx.:/-+_%e "
+    words = ["inf", "-1_0", "1e3", "::1", "fe80::1%eth0", "::ffff:10.0.0.1", "10.0.0.0/8"]
+    words += ["".join(rand.choices(chars, k=rand.randint(1, 12))) for _ in range(20000)]
+    for cls in [
+        IntToken,
+        FloatToken,
+        IPv4AddressToken,
+        IPv6AddressToken,
+        IPAddressToken,
+        InterfaceAddressToken,
+        IPv4NetworkToken,
+        IPv6NetworkToken,
+    ]:
+        token = cls()
+        accepts, requires, _ = _traits(cls)
+        for word in words:
+            if token.match(word):
+                assert not classify(word) & ~accepts, (cls, word)
+                assert classify(word) & requires == requires, (cls, word)
+
+    class HexToken(IntToken):
+        def match(self, text: str) -> bool:
+            return text.startswith("0x")
+
+    # overriding match() without word_classes disables pruning, and
+    # the overridden match() is used
+    root = TextToken(text="root")
+    hex = HexToken()
+    root.append(hex)
+    assert root.match_leaf_value("0xff") == (hex, "0xff")
+    assert root.match_leaf("10") is None
+
+
+def test_expand_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    root = TextToken(text="root")
+    root.append(*[TextToken(text=f"knob{i:04}") for i in range(2000)])
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(root.expand, ["knob1999"] * 64))
+    assert results == [["knob1999"]] * 64